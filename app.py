@@ -1,22 +1,37 @@
 import os
+import json
 import time
 import uuid
-from flask import Flask, request, render_template, send_file, jsonify
+from flask import Flask, Request, Response, request, render_template, send_file, jsonify, stream_with_context
 from werkzeug.utils import secure_filename
 import tempfile
 import shutil
 import zipfile
 import io
-from cf_to_tf_converter import process_cf_file
+from cf_to_tf_converter import process_cf_data, merge_resource_index, OUTPUT_FORMATS
 from docs_generator import generate_docs, save_docs
-from state_file_generator import generate_state_file
+from state_file_generator import generate_state_file, build_inventory_scope
 from diff_tool import generate_diff_report
+from aws_scheduler import RequestScheduler
+
+
+class SpooledRequest(Request):
+    """Keeps each uploaded file in memory up to UPLOAD_SPOOL_MAX_SIZE bytes and spills larger ones to a temporary file."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=app.config['UPLOAD_SPOOL_MAX_SIZE'], mode='rb+')
 
 
 app = Flask(__name__)
+app.request_class = SpooledRequest
+# Uploads and archive members up to this size are converted without touching the disk
+app.config['UPLOAD_SPOOL_MAX_SIZE'] = int(os.environ.get('CF2TF_UPLOAD_SPOOL_MAX_SIZE', 1024 * 1024))
 
 ALLOWED_EXTENSIONS = {'yaml', 'yml', 'json', 'zip'}
 TEMP_DIR = os.path.join(tempfile.gettempdir(), 'cf2tf_converter')
+STREAM_MIMETYPE = 'application/x-ndjson'
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -25,6 +40,117 @@ def allowed_file(filename):
 def index():
     return render_template('index.html')
 
+def read_template(source):
+    """Return the text of a template held as bytes, an uploaded stream or a file path."""
+    if isinstance(source, bytes):
+        return source.decode('utf-8')
+    if isinstance(source, str):
+        with open(source, 'r') as f:
+            return f.read()
+    source.seek(0)
+    return source.read().decode('utf-8')
+
+def convert_template(source, filename, output_dir, output_format):
+    """Convert one template and write its Terraform code, docs and diff report to output_dir."""
+    _, tf_extension = OUTPUT_FORMATS[output_format]
+    base_name = os.path.splitext(filename)[0]
+    # Read once; conversion and the diff both work from this text
+    cf_content = read_template(source)
+    result = process_cf_data(cf_content, output_format)
+
+    # Generate and save documentation
+    # The parse tree is only needed here; keep it out of the stored and returned results
+    docs = generate_docs(result["terraform_code"], result["security_issues"], result.pop("terraform_tree"))
+    docs_filename = base_name + '_docs.md'
+    save_docs(docs, os.path.join(output_dir, docs_filename))
+
+    # Save Terraform code
+    tf_filename = base_name + tf_extension
+    with open(os.path.join(output_dir, tf_filename), 'w') as f:
+        f.write(result["terraform_code"])
+
+    # Generate diff report
+    diff_report = generate_diff_report(cf_content, result["terraform_code"], output_format)
+    diff_filename = base_name + '_diff.txt'
+    with open(os.path.join(output_dir, diff_filename), 'w') as f:
+        f.write(diff_report)
+
+    result["artifacts"] = {"terraform": tf_filename, "docs": docs_filename, "diff": diff_filename}
+    return result
+
+def collect_templates(files, input_dir):
+    """List (source, filename) for every template in the upload.
+
+    Uploads are converted straight from their spooled streams. Archive
+    members up to UPLOAD_SPOOL_MAX_SIZE are read into memory and larger
+    ones are extracted to input_dir.
+    """
+    max_size = app.config['UPLOAD_SPOOL_MAX_SIZE']
+    templates = []
+    for file in files:
+        if not (file and allowed_file(file.filename)):
+            continue
+        filename = secure_filename(file.filename)
+        if not filename.endswith('.zip'):
+            templates.append((file.stream, filename))
+            continue
+        with zipfile.ZipFile(file.stream, 'r') as zip_ref:
+            for info in zip_ref.infolist():
+                member_name = os.path.basename(info.filename)
+                if info.is_dir() or member_name.endswith('.zip') or not allowed_file(member_name):
+                    continue
+                if info.file_size <= max_size:
+                    templates.append((zip_ref.read(info), member_name))
+                else:
+                    templates.append((zip_ref.extract(info, input_dir), member_name))
+    return templates
+
+def record_result(conversion_id, conversion_dir, index, filename, result):
+    """Store a file's full result for the per-file endpoints and return its summary."""
+    results_dir = os.path.join(conversion_dir, 'results')
+    os.makedirs(results_dir, exist_ok=True)
+    with open(os.path.join(results_dir, f'{index}.json'), 'w') as f:
+        json.dump(dict(result, index=index, file=filename), f)
+
+    summary = {
+        "index": index,
+        "file": filename,
+        "security_score": result["security_score"],
+        "issue_count": len(result["security_issues"]),
+        "resource_count": len(result["resource_index"]),
+        "url": f"/conversions/{conversion_id}/files/{index}"
+    }
+    with open(os.path.join(results_dir, 'summaries.jsonl'), 'a') as f:
+        f.write(json.dumps(summary) + "\n")
+    return summary
+
+def finish_conversion(conversion_id, conversion_dir, output_dir, resource_index, stack_names=None):
+    """Write the state file and zip the output directory; return the download URL and state failures."""
+    # Generate state file
+    regions = ["us-west-2", "us-east-1"]  # You might want to make this configurable
+    # Only inventory the types, logical IDs and names the converted templates declare
+    scope = build_inventory_scope(resource_index, stack_names)
+    scheduler = RequestScheduler()
+    state_file = generate_state_file(regions, list(scope), scheduler, scope=scope)
+    state_file_path = os.path.join(output_dir, 'terraform.tfstate')
+    with open(state_file_path, 'w') as f:
+        f.write(state_file)
+
+    # Create a zip file of all converted files
+    zip_filename = f'converted_files_{conversion_id}.zip'
+    zip_path = os.path.join(conversion_dir, zip_filename)
+    with zipfile.ZipFile(zip_path, 'w') as zipf:
+        for root, _, files in os.walk(output_dir):
+            for file in files:
+                file_path = os.path.join(root, file)
+                arcname = os.path.relpath(file_path, output_dir)
+                zipf.write(file_path, arcname)
+
+    return f"/download_converted_files/{conversion_id}", scheduler.failures
+
+def ndjson(event):
+    return json.dumps(event) + "\n"
+
 @app.route('/convert', methods=['POST'])
 def convert_files():
     if 'file' not in request.files:
@@ -34,98 +160,41 @@ def convert_files():
     if not files or files[0].filename == '':
         return jsonify({'error': 'No selected file'}), 400
 
+    output_format = request.form.get('format', 'hcl')
+    if output_format not in OUTPUT_FORMATS:
+        return jsonify({'error': f'Unsupported output format: {output_format}'}), 400
+    # Stacks the templates are deployed as; without them live inventory matches on logical ID alone
+    stack_names = request.form.getlist('stack_name')
+
     conversion_id = str(uuid.uuid4())
     conversion_dir = os.path.join(TEMP_DIR, conversion_id)
     input_dir = os.path.join(conversion_dir, 'input')
     output_dir = os.path.join(conversion_dir, 'output')
-    os.makedirs(input_dir, exist_ok=True)
     os.makedirs(output_dir, exist_ok=True)
 
+    try:
+        templates = collect_templates(files, input_dir)
+    except Exception as e:
+        return jsonify({'error': f'Conversion failed: {str(e)}'}), 500
+
+    if request.args.get('stream'):
+        return Response(stream_with_context(stream_conversion(conversion_id, conversion_dir, output_dir, templates, output_format, stack_names)),
+                        mimetype=STREAM_MIMETYPE)
+
     try:
         results = []
-        for file in files:
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                file_path = os.path.join(input_dir, filename)
-                file.save(file_path)
-
-                if filename.endswith('.zip'):
-                    with zipfile.ZipFile(file_path, 'r') as zip_ref:
-                        zip_ref.extractall(input_dir)
-                    os.remove(file_path)
-                else:
-                    result = process_cf_file(file_path)
-                    results.append(result)
-                    
-                    # Generate and save documentation
-                    docs = generate_docs(result["terraform_code"], result["security_issues"])
-                    docs_filename = os.path.splitext(filename)[0] + '_docs.md'
-                    docs_path = os.path.join(output_dir, docs_filename)
-                    save_docs(docs, docs_path)
-                    
-                    # Save Terraform code
-                    tf_filename = os.path.splitext(filename)[0] + '.tf'
-                    tf_path = os.path.join(output_dir, tf_filename)
-                    with open(tf_path, 'w') as f:
-                        f.write(result["terraform_code"])
-                    
-                    # Generate diff report
-                    with open(file_path, 'r') as cf_file, open(tf_path, 'r') as tf_file:
-                        diff_report = generate_diff_report(cf_file.read(), tf_file.read())
-                    diff_filename = os.path.splitext(filename)[0] + '_diff.txt'
-                    diff_path = os.path.join(output_dir, diff_filename)
-                    with open(diff_path, 'w') as f:
-                        f.write(diff_report)
-
-        # Process any extracted files from zip
-        for root, _, files in os.walk(input_dir):
-            for file in files:
-                if allowed_file(file):
-                    file_path = os.path.join(root, file)
-                    result = process_cf_file(file_path)
-                    results.append(result)
-                    
-                    # Generate and save documentation
-                    docs = generate_docs(result["terraform_code"], result["security_issues"])
-                    docs_filename = os.path.splitext(file)[0] + '_docs.md'
-                    docs_path = os.path.join(output_dir, docs_filename)
-                    save_docs(docs, docs_path)
-                    
-                    # Save Terraform code
-                    tf_filename = os.path.splitext(file)[0] + '.tf'
-                    tf_path = os.path.join(output_dir, tf_filename)
-                    with open(tf_path, 'w') as f:
-                        f.write(result["terraform_code"])
-                    
-                    # Generate diff report
-                    with open(file_path, 'r') as cf_file, open(tf_path, 'r') as tf_file:
-                        diff_report = generate_diff_report(cf_file.read(), tf_file.read())
-                    diff_filename = os.path.splitext(file)[0] + '_diff.txt'
-                    diff_path = os.path.join(output_dir, diff_filename)
-                    with open(diff_path, 'w') as f:
-                        f.write(diff_report)
-
-        # Generate state file
-        regions = ["us-west-2", "us-east-1"]  # You might want to make this configurable
-        resource_types = ["aws_s3_bucket", "aws_ec2_instance", "aws_vpc", "aws_subnet", "aws_security_group"]
-        state_file = generate_state_file(regions, resource_types)
-        state_file_path = os.path.join(output_dir, 'terraform.tfstate')
-        with open(state_file_path, 'w') as f:
-            f.write(state_file)
-
-        # Create a zip file of all converted files
-        zip_filename = f'converted_files_{conversion_id}.zip'
-        zip_path = os.path.join(conversion_dir, zip_filename)
-        with zipfile.ZipFile(zip_path, 'w') as zipf:
-            for root, _, files in os.walk(output_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    arcname = os.path.relpath(file_path, output_dir)
-                    zipf.write(file_path, arcname)
+        resource_index = {}
+        for index, (source, filename) in enumerate(templates):
+            result = convert_template(source, filename, output_dir, output_format)
+            merge_resource_index(resource_index, result["resource_index"], filename)
+            record_result(conversion_id, conversion_dir, index, filename, result)
+            results.append(result)
 
+        download_url, state_failures = finish_conversion(conversion_id, conversion_dir, output_dir, resource_index, stack_names)
         return jsonify({
             "results": results,
-            "download_url": f"/download_converted_files/{conversion_id}"
+            "state_failures": state_failures,
+            "download_url": download_url
         })
 
     except Exception as e:
@@ -134,6 +203,83 @@ def convert_files():
         # Don't remove temp_dir here, as we need it for the download
         pass
 
+def stream_conversion(conversion_id, conversion_dir, output_dir, templates, output_format, stack_names=None):
+    """Yield NDJSON progress events: a start event, one summary per file as it is converted, then done.
+
+    Full results are not part of the stream; clients fetch them from the
+    per-file endpoints using the url in each summary.
+    """
+    yield ndjson({"event": "start", "conversion_id": conversion_id, "total": len(templates)})
+    resource_index = {}
+    converted = 0
+    for index, (source, filename) in enumerate(templates):
+        try:
+            result = convert_template(source, filename, output_dir, output_format)
+            # A file reusing an earlier file's logical IDs is reported instead of recorded
+            merge_resource_index(resource_index, result["resource_index"], filename)
+            summary = record_result(conversion_id, conversion_dir, index, filename, result)
+        except Exception as e:
+            # The response has already started, so a failed file is reported in-band
+            yield ndjson({"event": "error", "index": index, "file": filename, "error": f'Conversion failed: {str(e)}'})
+            continue
+        converted += 1
+        yield ndjson(dict({"event": "file"}, **summary))
+
+    try:
+        download_url, state_failures = finish_conversion(conversion_id, conversion_dir, output_dir, resource_index, stack_names)
+    except Exception as e:
+        yield ndjson({"event": "error", "error": f'Conversion failed: {str(e)}'})
+        return
+    yield ndjson({
+        "event": "done",
+        "converted": converted,
+        "total": len(templates),
+        "state_failures": state_failures,
+        "download_url": download_url
+    })
+
+@app.route('/conversions/<uuid:conversion_id>/files', methods=['GET'])
+def list_converted_files(conversion_id):
+    summaries_path = os.path.join(TEMP_DIR, str(conversion_id), 'results', 'summaries.jsonl')
+    if not os.path.exists(summaries_path):
+        return jsonify({'error': 'Conversion not found'}), 404
+
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(MAX_PAGE_SIZE, max(1, request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int)))
+    with open(summaries_path, 'r') as f:
+        summaries = [json.loads(line) for line in f if line.strip()]
+    summaries.sort(key=lambda summary: summary["index"])
+
+    start = (page - 1) * per_page
+    has_next = start + per_page < len(summaries)
+    return jsonify({
+        "files": summaries[start:start + per_page],
+        "page": page,
+        "per_page": per_page,
+        "total": len(summaries),
+        "next": f"/conversions/{conversion_id}/files?page={page + 1}&per_page={per_page}" if has_next else None
+    })
+
+@app.route('/conversions/<uuid:conversion_id>/files/<int:index>', methods=['GET'])
+def get_converted_file(conversion_id, index):
+    result_path = os.path.join(TEMP_DIR, str(conversion_id), 'results', f'{index}.json')
+    if not os.path.exists(result_path):
+        return jsonify({'error': 'Converted file not found'}), 404
+    return send_file(result_path, mimetype='application/json')
+
+@app.route('/conversions/<uuid:conversion_id>/files/<int:index>/<artifact>', methods=['GET'])
+def get_converted_artifact(conversion_id, index, artifact):
+    conversion_dir = os.path.join(TEMP_DIR, str(conversion_id))
+    result_path = os.path.join(conversion_dir, 'results', f'{index}.json')
+    if not os.path.exists(result_path):
+        return jsonify({'error': 'Converted file not found'}), 404
+    with open(result_path, 'r') as f:
+        artifacts = json.load(f)["artifacts"]
+    if artifact not in artifacts:
+        return jsonify({'error': f'Unknown artifact: {artifact}'}), 404
+    return send_file(os.path.join(conversion_dir, 'output', artifacts[artifact]), mimetype='text/plain',
+                     as_attachment=request.args.get('download') is not None, download_name=artifacts[artifact])
+
 @app.route('/download_converted_files/<conversion_id>', methods=['GET'])
 def download_converted_files(conversion_id):
     conversion_dir = os.path.join(TEMP_DIR, conversion_id)
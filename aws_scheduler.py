@@ -0,0 +1,200 @@
+import time
+import random
+import threading
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+# Error codes AWS services use to signal throttling
+THROTTLE_CODES = {
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottled',
+    'RequestThrottledException', 'RequestLimitExceeded', 'TooManyRequestsException',
+    'SlowDown', 'BandwidthLimitExceeded', 'EC2ThrottledException',
+    'ProvisionedThroughputExceededException', 'PriorRequestNotComplete',
+}
+# Transient server-side errors worth retrying, but not a reason to slow down
+TRANSIENT_CODES = {'InternalError', 'InternalFailure', 'ServiceUnavailable', 'RequestTimeout', 'RequestTimeoutException'}
+
+def error_code(error: Exception) -> Optional[str]:
+    """Return the AWS error code carried by a botocore ClientError (or anything shaped like one)."""
+    response = getattr(error, 'response', None) or {}
+    return response.get('Error', {}).get('Code')
+
+class TokenBucket:
+    """Thread-safe token bucket whose refill rate can be changed while in use."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+class AdaptiveLimiter:
+    """Concurrency limit that halves on throttling and grows by one slot per window of successes (AIMD)."""
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self._in_flight >= int(self.limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, throttled: bool):
+        with self._condition:
+            self._in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit / 2)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+class RequestScheduler:
+    """Schedules AWS API calls with per-service, per-region token buckets, adaptive concurrency and jittered retries.
+
+    AWS throttles each region separately, so throttling in one region does
+    not slow down calls to the others. Calls that still fail after
+    max_attempts raise their last error; callers record them with
+    record_failure so incomplete inventories are reported instead of
+    silently dropped.
+    """
+
+    def __init__(self, rate: float = 10.0, burst: float = 20.0, max_concurrency: int = 10, max_attempts: int = 8,
+                 base_delay: float = 0.1, max_delay: float = 20.0, min_rate: float = 0.5,
+                 service_rates: Dict[str, float] = None, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.min_rate = min_rate
+        self.service_rates = service_rates or {}
+        self.failures: List[Dict[str, Any]] = []
+        self.stats = {"calls": 0, "throttled": 0, "retries": 0}
+        self._sleep = sleep
+        self._services: Dict[Tuple[str, Optional[str]], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _service(self, service: str, region: str = None) -> Dict[str, Any]:
+        key = (service, region)
+        with self._lock:
+            if key not in self._services:
+                max_rate = self.service_rates.get(service, self.rate)
+                self._services[key] = {
+                    "max_rate": max_rate,
+                    "bucket": TokenBucket(max_rate, self.burst, sleep=self._sleep),
+                    "limiter": AdaptiveLimiter(max(1, self.max_concurrency // 2), self.max_concurrency),
+                }
+            return self._services[key]
+
+    def _adjust_rate(self, state: Dict[str, Any], throttled: bool):
+        bucket = state["bucket"]
+        with self._lock:
+            if throttled:
+                bucket.rate = max(self.min_rate, bucket.rate * 0.5)
+            else:
+                bucket.rate = min(state["max_rate"], bucket.rate + state["max_rate"] * 0.05)
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def backoff(self, attempt: int) -> float:
+        # Full jitter: a random delay up to the exponential cap
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, service: str, func: Callable[..., Any], *args, region: str = None, **kwargs) -> Any:
+        """Call func(*args, **kwargs) under the limits for service in region."""
+        state = self._service(service, region)
+        attempt = 0
+        while True:
+            state["bucket"].acquire()
+            state["limiter"].acquire()
+            throttled = False
+            try:
+                self._count("calls")
+                return func(*args, **kwargs)
+            except Exception as e:
+                code = error_code(e)
+                throttled = code in THROTTLE_CODES
+                if throttled:
+                    self._count("throttled")
+                if not throttled and code not in TRANSIENT_CODES:
+                    raise
+                attempt += 1
+                if attempt >= self.max_attempts:
+                    raise
+            finally:
+                state["limiter"].release(throttled)
+                self._adjust_rate(state, throttled)
+            self._count("retries")
+            self._sleep(self.backoff(attempt))
+
+    def record_failure(self, resource_type: str, region: str, error: Exception, resource_id: str = None):
+        with self._lock:
+            self.failures.append({
+                "resource_type": resource_type,
+                "region": region,
+                "resource_id": resource_id,
+                "error_code": error_code(error),
+                "error": str(error)
+            })
+
+    def has_failures(self, resource_type: str, region: str) -> bool:
+        with self._lock:
+            return any(f["resource_type"] == resource_type and f["region"] == region for f in self.failures)
+
+if __name__ == "__main__":
+    # For testing purposes: a fake endpoint that throttles above 20 requests/second
+    from concurrent.futures import ThreadPoolExecutor
+
+    class FakeThrottleError(Exception):
+        def __init__(self):
+            super().__init__("Rate exceeded")
+            self.response = {"Error": {"Code": "RequestLimitExceeded"}}
+
+    class FakeEndpoint:
+        def __init__(self, limit_per_second: int):
+            self.limit = limit_per_second
+            self.window = int(time.monotonic())
+            self.count = 0
+            self.throttled = 0
+            self.lock = threading.Lock()
+
+        def describe(self, item: int) -> int:
+            with self.lock:
+                now = int(time.monotonic())
+                if now != self.window:
+                    self.window, self.count = now, 0
+                self.count += 1
+                if self.count > self.limit:
+                    self.throttled += 1
+                    raise FakeThrottleError()
+            return item
+
+    endpoint = FakeEndpoint(limit_per_second=20)
+    scheduler = RequestScheduler(rate=50, burst=10, max_concurrency=8)
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda i: scheduler.call('fake', endpoint.describe, i), range(100)))
+    print(f"Fetched {len(results)} items in {time.monotonic() - start:.1f}s")
+    print(f"Throttled responses: {endpoint.throttled}, retries: {scheduler.stats['retries']}, failures: {len(scheduler.failures)}")
@@ -0,0 +1,76 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from cf2tf_client import send_request
+
+TEMPLATE = """
+Parameters:
+  Env:
+    Type: String
+    Default: dev
+Resources:
+  Bucket:
+    Type: AWS::S3::Bucket
+    Properties:
+      BucketName: !Sub "${Env}-bucket"
+      AccessControl: Private
+  Queue:
+    Type: AWS::SQS::Queue
+    Properties:
+      QueueName: queue
+"""
+
+def average(func, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return (time.perf_counter() - start) / runs
+
+def wait_for(socket_path: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            send_request({"command": "ping"}, socket_path)
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("Daemon did not start")
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    work_dir = tempfile.mkdtemp()
+    template_path = os.path.join(work_dir, 'stack.yaml')
+    export_path = os.path.join(work_dir, 'export.json')
+    output_dir = os.path.join(work_dir, 'out')
+    with open(template_path, 'w') as f:
+        f.write(TEMPLATE)
+    with open(export_path, 'w') as f:
+        json.dump({"StackResources": []}, f)
+
+    # Offline state keeps AWS out of the measurement
+    args = [template_path, '-o', output_dir, '--stack-export', export_path]
+    socket_path = os.path.join(work_dir, 'daemon.sock')
+    env = dict(os.environ, CF2TF_DAEMON_SOCKET=socket_path)
+    quiet = {"stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL, "env": env}
+
+    daemon = subprocess.Popen([sys.executable, os.path.join(ROOT, 'conversion_daemon.py')], **quiet)
+    try:
+        wait_for(socket_path)
+        cli_time = average(lambda: subprocess.run([sys.executable, os.path.join(ROOT, 'cli_converter.py')] + args, **quiet), runs)
+        client_time = average(lambda: subprocess.run([sys.executable, os.path.join(ROOT, 'cf2tf_client.py'), 'convert'] + args, **quiet), runs)
+        request_time = average(lambda: send_request({"command": "convert", "args": args, "cwd": work_dir}, socket_path), runs)
+        interpreter_time = average(lambda: subprocess.run([sys.executable, '-c', 'pass'], **quiet), runs)
+    finally:
+        send_request({"command": "stop"}, socket_path)
+        daemon.wait()
+
+    print(f"{'cli_converter.py':<28} {cli_time * 1000:>8.1f} ms")
+    print(f"{'cf2tf_client.py convert':<28} {client_time * 1000:>8.1f} ms")
+    print(f"{'daemon request only':<28} {request_time * 1000:>8.1f} ms")
+    print(f"{'bare interpreter start':<28} {interpreter_time * 1000:>8.1f} ms")
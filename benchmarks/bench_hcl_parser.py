@@ -0,0 +1,92 @@
+import os
+import re
+import sys
+import time
+from typing import List, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from docs_generator import parse_resources, parse_variables, parse_outputs
+from hcl_parser import parse_hcl
+
+# Regex parsers that docs_generator used before the HCL parser, kept for comparison
+def regex_parse_resources(terraform_code: str) -> Dict[str, List[str]]:
+    resources = {}
+    for match in re.finditer(r'resource\s+"(\w+)"\s+"(\w+)"\s+{', terraform_code):
+        resource_type, resource_name = match.groups()
+        resources.setdefault(resource_type, []).append(resource_name)
+    return resources
+
+def regex_parse_variables(terraform_code: str) -> Dict[str, Dict[str, str]]:
+    variables = {}
+    for match in re.finditer(r'variable\s+"(\w+)"\s+{([^}]*)}', terraform_code, re.DOTALL):
+        var_name, var_block = match.groups()
+        variables[var_name] = {}
+        if 'description' in var_block:
+            variables[var_name]['description'] = re.search(r'description\s*=\s*"([^"]*)"', var_block).group(1)
+        if 'type' in var_block:
+            variables[var_name]['type'] = re.search(r'type\s*=\s*(\w+)', var_block).group(1)
+        if 'default' in var_block:
+            variables[var_name]['default'] = re.search(r'default\s*=\s*([^\n]+)', var_block).group(1)
+    return variables
+
+def regex_parse_outputs(terraform_code: str) -> Dict[str, Dict[str, str]]:
+    outputs = {}
+    for match in re.finditer(r'output\s+"(\w+)"\s+{([^}]*)}', terraform_code, re.DOTALL):
+        output_name, output_block = match.groups()
+        outputs[output_name] = {}
+        if 'description' in output_block:
+            outputs[output_name]['description'] = re.search(r'description\s*=\s*"([^"]*)"', output_block).group(1)
+        if 'value' in output_block:
+            outputs[output_name]['value'] = re.search(r'value\s*=\s*([^\n]+)', output_block).group(1)
+    return outputs
+
+def build_terraform(count: int) -> str:
+    parts = []
+    for i in range(count):
+        parts.append(f'''variable "var_{i}" {{
+  description = "Variable {i}"
+  type        = string
+  default     = "value-{i}"
+}}
+
+resource "aws_security_group" "sg_{i}" {{
+  name = "sg-{i}"
+  ingress {{
+    from_port   = 443
+    to_port     = 443
+    cidr_blocks = ["10.0.0.0/16"]
+  }}
+  tags = {{
+    Name = "${{var.var_{i}}}"
+  }}
+}}
+
+output "sg_{i}_id" {{
+  description = "Security group {i}"
+  value       = aws_security_group.sg_{i}.id
+}}
+''')
+    return '\n'.join(parts)
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def run_regex(terraform_code: str):
+    regex_parse_resources(terraform_code)
+    regex_parse_variables(terraform_code)
+    regex_parse_outputs(terraform_code)
+
+def run_parser(terraform_code: str):
+    tree = parse_hcl(terraform_code)
+    parse_resources(terraform_code, tree)
+    parse_variables(terraform_code, tree)
+    parse_outputs(terraform_code, tree)
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]
+    print(f"{'blocks':>8} {'size (KB)':>10} {'regex (s)':>10} {'parser (s)':>11}")
+    for count in sizes:
+        terraform_code = build_terraform(count)
+        print(f"{count * 3:>8} {len(terraform_code) // 1024:>10} {timed(run_regex, terraform_code):>10.3f} {timed(run_parser, terraform_code):>11.3f}")
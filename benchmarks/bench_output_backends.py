@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cf_to_tf_converter import convert_to_terraform, convert_to_terraform_json
+from hcl_parser import parse_hcl, parse_tf_json, parse_terraform
+from security_analyzer import analyze_security, generate_security_report
+from docs_generator import generate_docs
+
+def build_template(count: int) -> dict:
+    resources = {}
+    for i in range(count):
+        resources[f"Bucket{i}"] = {
+            "Type": "AWS::S3::Bucket",
+            "Properties": {
+                "BucketName": f"bucket-{i}",
+                "AccessControl": "Private",
+                "VersioningConfiguration": {"Status": "Enabled"}
+            }
+        }
+        resources[f"Queue{i}"] = {
+            "Type": "AWS::SQS::Queue",
+            "Properties": {
+                "QueueName": f"queue-{i}",
+                "VisibilityTimeout": 30,
+                "Tags": [{"Key": "Name", "Value": f"queue \"{i}\""}]
+            }
+        }
+    return {
+        "Parameters": {"Env": {"Type": "String", "Default": "dev", "Description": "Environment"}},
+        "Resources": resources,
+        "Outputs": {"FirstBucket": {"Value": {"Ref": "Bucket0"}, "Description": "First bucket"}}
+    }
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def pipeline(convert, template: dict) -> float:
+    # Conversion followed by the analysis, report and docs passes the CLI and web app run, sharing one parse
+    start = time.perf_counter()
+    code = convert(template)
+    tree = parse_terraform(code)
+    issues = analyze_security(code, tree)
+    generate_security_report(code, issues)
+    generate_docs(code, issues, tree)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000]
+    print(f"{'resources':>10} {'hcl (s)':>8} {'json (s)':>9} {'parse hcl (s)':>14} {'parse json (s)':>15} {'pipeline hcl (s)':>17} {'pipeline json (s)':>18}")
+    for count in sizes:
+        template = build_template(count)
+        hcl_code, hcl_time = timed(convert_to_terraform, template)
+        json_code, json_time = timed(convert_to_terraform_json, template)
+        _, parse_hcl_time = timed(parse_hcl, hcl_code)
+        _, parse_json_time = timed(parse_tf_json, json_code)
+        pipeline_hcl_time = pipeline(convert_to_terraform, template)
+        pipeline_json_time = pipeline(convert_to_terraform_json, template)
+        print(f"{count * 2:>10} {hcl_time:>8.3f} {json_time:>9.3f} {parse_hcl_time:>14.3f} {parse_json_time:>15.3f} "
+              f"{pipeline_hcl_time:>17.3f} {pipeline_json_time:>18.3f}")
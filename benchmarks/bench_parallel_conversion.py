@@ -0,0 +1,29 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cf_to_tf_converter import convert_to_terraform, convert_to_terraform_json
+from bench_output_backends import build_template
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+if __name__ == "__main__":
+    # Usage: bench_parallel_conversion.py [resource pairs ...]; worker counts go up to the CPU count.
+    # Set CF2TF_PARALLEL_MIN_RESOURCES where the speedup is clearly above 1
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]
+    cpus = os.cpu_count()
+    worker_counts = [n for n in (2, 4, 8, 16) if n <= cpus] or [2]
+    print(f"CPUs: {cpus}")
+    print(f"{'backend':>8} {'resources':>10} {'workers':>8} {'time (s)':>9} {'speedup':>8} {'identical':>10}")
+    for count in sizes:
+        template = build_template(count)
+        for backend, convert in (('hcl', convert_to_terraform), ('json', convert_to_terraform_json)):
+            serial_code, serial_time = timed(convert, template, 1)
+            print(f"{backend:>8} {count * 2:>10} {1:>8} {serial_time:>9.3f} {1.0:>8.2f} {'':>10}")
+            for workers in worker_counts:
+                code, parallel_time = timed(convert, template, workers)
+                print(f"{backend:>8} {count * 2:>10} {workers:>8} {parallel_time:>9.3f} {serial_time / parallel_time:>8.2f} {str(code == serial_code):>10}")
@@ -0,0 +1,87 @@
+import os
+import sys
+import json
+import stat
+import socket
+
+# Only cheap imports here (not even typing or tempfile): starting the client is the per-call cost
+
+def default_socket_path() -> str:
+    """$CF2TF_DAEMON_SOCKET, else a socket in $XDG_RUNTIME_DIR, else one in a per-user directory under $TMPDIR."""
+    if os.environ.get('CF2TF_DAEMON_SOCKET'):
+        return os.environ['CF2TF_DAEMON_SOCKET']
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], 'cf2tf-daemon.sock')
+    return os.path.join(os.environ.get('TMPDIR', '/tmp'), f'cf2tf-{os.getuid()}', 'daemon.sock')
+
+DEFAULT_SOCKET = default_socket_path()
+
+def check_private_dir(path: str):
+    """Raise PermissionError unless path is a directory owned by this user that nobody else can write to."""
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o022:
+        raise PermissionError(f"{path} is not a private directory owned by this user")
+
+def check_socket(socket_path: str):
+    """Raise PermissionError unless socket_path is this user's socket in a directory only this user can write to.
+
+    Without this, another local user could bind the socket first and answer
+    in the daemon's place.
+    """
+    check_private_dir(os.path.dirname(os.path.abspath(socket_path)))
+    info = os.lstat(socket_path)
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"{socket_path} is not a socket owned by this user")
+COMMANDS = ('convert', 'analyze', 'docs')
+CONTROL_COMMANDS = ('ping', 'stop')
+
+USAGE = """usage: cf2tf_client.py {convert,analyze,docs,ping,stop} [arguments ...]
+
+Forwards the arguments to the conversion daemon (see conversion_daemon.py):
+  convert  same arguments as cli_converter.py
+  analyze  same arguments as security_scanner.py
+  docs     <terraform_file> [-o <docs_file>]
+Runs the command in this process if no daemon is listening on
+$CF2TF_DAEMON_SOCKET (default: %s), or if that socket or its directory
+is not private to this user.""" % DEFAULT_SOCKET
+
+def send_request(request: dict, socket_path: str = DEFAULT_SOCKET) -> dict:
+    """Send one request to the daemon and return its response."""
+    check_socket(socket_path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode('utf-8') + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return json.loads(b"".join(chunks))
+
+def main(argv: list = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS + CONTROL_COMMANDS:
+        print(USAGE, file=sys.stderr)
+        return 2
+
+    command, args = argv[0], argv[1:]
+    try:
+        response = send_request({"command": command, "args": args, "cwd": os.getcwd()})
+    except (FileNotFoundError, ConnectionRefusedError, PermissionError) as e:
+        if isinstance(e, PermissionError):
+            print(f"Not using the daemon: {e}", file=sys.stderr)
+        if command in CONTROL_COMMANDS:
+            print(f"No daemon is listening on {DEFAULT_SOCKET}", file=sys.stderr)
+            return 1
+        # No daemon running: do the work here, at the usual start-up cost
+        from conversion_daemon import run_command
+        return run_command(command, args)
+
+    sys.stdout.write(response.get("stdout", ""))
+    sys.stderr.write(response.get("stderr", ""))
+    return response.get("exit_code", 1)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,16 @@
 import yaml
 import json
 import os
-from typing import Dict, Any, List
+import gc
+from multiprocessing import Pool
+from typing import Dict, Any, List, Tuple, Callable, IO, Union, Optional
 from security_analyzer import analyze_security, generate_security_report, get_security_score
+from template_specializer import specialize_template
+from hcl_parser import parse_terraform
 
 class CloudFormationLoader(yaml.SafeLoader):
     def __init__(self, stream):
-        self._root = stream.name
+        self._root = getattr(stream, 'name', '<string>')
         super(CloudFormationLoader, self).__init__(stream)
 
 def construct_cfn_tag(loader, node):
@@ -17,8 +21,57 @@ def construct_cfn_tag(loader, node):
     elif isinstance(node, yaml.MappingNode):
         return {construct_cfn_tag(loader, k): construct_cfn_tag(loader, v) for k, v in node.value}
 
-for tag in ['!Ref', '!GetAtt', '!Sub', '!Join', '!Select', '!Split', '!FindInMap', '!If', '!Equals', '!And', '!Or', '!Not', '!ImportValue']:
+# Condition functions are loaded in their long form ({"Fn::Equals": [...]}),
+# with Refs as {"Ref": name}, so they can be evaluated like JSON templates
+CONDITION_FUNCTIONS = {
+    '!Equals': 'Fn::Equals',
+    '!And': 'Fn::And',
+    '!Or': 'Fn::Or',
+    '!Not': 'Fn::Not',
+    '!If': 'Fn::If',
+    '!Condition': 'Condition',
+}
+
+def construct_condition_tag(loader, node):
+    # Fn::If branches are property values, not expressions to evaluate
+    in_expression = node.tag != '!If'
+    if isinstance(node, yaml.ScalarNode):
+        args = node.value
+    elif isinstance(node, yaml.SequenceNode):
+        args = [construct_condition_argument(loader, item, in_expression) for item in node.value]
+    else:
+        args = {loader.construct_object(k): construct_condition_argument(loader, v, in_expression) for k, v in node.value}
+    return {CONDITION_FUNCTIONS[node.tag]: args}
+
+def construct_condition_argument(loader, node, in_expression: bool = True):
+    if node.tag in CONDITION_FUNCTIONS:
+        return construct_condition_tag(loader, node)
+    if node.tag == '!Ref':
+        return {"Ref": node.value}
+    if node.tag.startswith('!'):
+        if in_expression:
+            # Long form, so the value counts as unknown rather than as a literal "${...}" string
+            return construct_long_form(loader, node)
+        return construct_cfn_tag(loader, node)
+    if isinstance(node, yaml.SequenceNode):
+        return [construct_condition_argument(loader, item, in_expression) for item in node.value]
+    if isinstance(node, yaml.MappingNode):
+        return {loader.construct_object(k): construct_condition_argument(loader, v, in_expression) for k, v in node.value}
+    return loader.construct_object(node)
+
+def construct_long_form(loader, node):
+    if isinstance(node, yaml.ScalarNode):
+        args = node.value.split('.', 1) if node.tag == '!GetAtt' else node.value
+    elif isinstance(node, yaml.SequenceNode):
+        args = [construct_condition_argument(loader, item) for item in node.value]
+    else:
+        args = {loader.construct_object(k): construct_condition_argument(loader, v) for k, v in node.value}
+    return {f"Fn::{node.tag[1:]}": args}
+
+for tag in ['!Ref', '!GetAtt', '!Sub', '!Join', '!Select', '!Split', '!FindInMap', '!ImportValue']:
     CloudFormationLoader.add_constructor(tag, construct_cfn_tag)
+for tag in CONDITION_FUNCTIONS:
+    CloudFormationLoader.add_constructor(tag, construct_condition_tag)
 
 def load_cloudformation_template(file_path: str) -> Dict[str, Any]:
     with open(file_path, 'r') as f:
@@ -27,43 +80,58 @@ def load_cloudformation_template(file_path: str) -> Dict[str, Any]:
         else:
             return yaml.load(f, Loader=CloudFormationLoader)
 
+def load_cloudformation_content(content: str) -> Dict[str, Any]:
+    if content.lstrip().startswith('{'):
+        return json.loads(content)
+    return yaml.load(content, Loader=CloudFormationLoader)
+
+def load_cloudformation_data(data: Union[str, bytes, IO]) -> Dict[str, Any]:
+    """Load a template from text, bytes or an open text or binary stream, such as an upload."""
+    if hasattr(data, 'read'):
+        data = data.read()
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    return load_cloudformation_content(data)
+
+RESOURCE_TYPE_MAPPING = {
+    'AWS::S3::Bucket': 'aws_s3_bucket',
+    'AWS::EC2::Instance': 'aws_instance',
+    'AWS::IAM::Role': 'aws_iam_role',
+    'AWS::Lambda::Function': 'aws_lambda_function',
+    'AWS::DynamoDB::Table': 'aws_dynamodb_table',
+    'AWS::RDS::DBInstance': 'aws_db_instance',
+    'AWS::ElasticLoadBalancingV2::LoadBalancer': 'aws_lb',
+    'AWS::ElasticLoadBalancingV2::TargetGroup': 'aws_lb_target_group',
+    'AWS::ElasticLoadBalancingV2::Listener': 'aws_lb_listener',
+    'AWS::EC2::SecurityGroup': 'aws_security_group',
+    'AWS::EC2::VPC': 'aws_vpc',
+    'AWS::EC2::Subnet': 'aws_subnet',
+    'AWS::EC2::InternetGateway': 'aws_internet_gateway',
+    'AWS::EC2::RouteTable': 'aws_route_table',
+    'AWS::EC2::Route': 'aws_route',
+    'AWS::EC2::EIP': 'aws_eip',
+    'AWS::EC2::NatGateway': 'aws_nat_gateway',
+    'AWS::IAM::Policy': 'aws_iam_policy',
+    'AWS::CloudWatch::Alarm': 'aws_cloudwatch_metric_alarm',
+    'AWS::SNS::Topic': 'aws_sns_topic',
+    'AWS::SQS::Queue': 'aws_sqs_queue',
+    'AWS::KMS::Key': 'aws_kms_key',
+    # Add more mappings here
+}
+
+PROPERTY_NAME_MAPPING = {
+    'BucketName': 'bucket',
+    'AccessControl': 'acl',
+    'VersioningConfiguration': 'versioning',
+    'ServerSideEncryptionConfiguration': 'server_side_encryption_configuration',
+    # Add more mappings here
+}
+
 def convert_resource_type(cf_type: str) -> str:
-    type_mapping = {
-        'AWS::S3::Bucket': 'aws_s3_bucket',
-        'AWS::EC2::Instance': 'aws_instance',
-        'AWS::IAM::Role': 'aws_iam_role',
-        'AWS::Lambda::Function': 'aws_lambda_function',
-        'AWS::DynamoDB::Table': 'aws_dynamodb_table',
-        'AWS::RDS::DBInstance': 'aws_db_instance',
-        'AWS::ElasticLoadBalancingV2::LoadBalancer': 'aws_lb',
-        'AWS::ElasticLoadBalancingV2::TargetGroup': 'aws_lb_target_group',
-        'AWS::ElasticLoadBalancingV2::Listener': 'aws_lb_listener',
-        'AWS::EC2::SecurityGroup': 'aws_security_group',
-        'AWS::EC2::VPC': 'aws_vpc',
-        'AWS::EC2::Subnet': 'aws_subnet',
-        'AWS::EC2::InternetGateway': 'aws_internet_gateway',
-        'AWS::EC2::RouteTable': 'aws_route_table',
-        'AWS::EC2::Route': 'aws_route',
-        'AWS::EC2::EIP': 'aws_eip',
-        'AWS::EC2::NatGateway': 'aws_nat_gateway',
-        'AWS::IAM::Policy': 'aws_iam_policy',
-        'AWS::CloudWatch::Alarm': 'aws_cloudwatch_metric_alarm',
-        'AWS::SNS::Topic': 'aws_sns_topic',
-        'AWS::SQS::Queue': 'aws_sqs_queue',
-        'AWS::KMS::Key': 'aws_kms_key',
-        # Add more mappings here
-    }
-    return type_mapping.get(cf_type, f"{cf_type.lower().replace('::', '_')}")
+    return RESOURCE_TYPE_MAPPING.get(cf_type, f"{cf_type.lower().replace('::', '_')}")
 
 def convert_property_name(name: str) -> str:
-    name_mapping = {
-        'BucketName': 'bucket',
-        'AccessControl': 'acl',
-        'VersioningConfiguration': 'versioning',
-        'ServerSideEncryptionConfiguration': 'server_side_encryption_configuration',
-        # Add more mappings here
-    }
-    converted = name_mapping.get(name, name)
+    converted = PROPERTY_NAME_MAPPING.get(name, name)
     return converted.lower().replace('_', '')
 
 def convert_property_value(value: Any, property_name: str) -> Any:
@@ -135,6 +203,56 @@ def convert_resource(name: str, resource: Dict[str, Any]) -> List[str]:
     
     return tf_resources
 
+# Must stay in sync with the resource blocks convert_resource emits
+def get_terraform_addresses(name: str, resource: Dict[str, Any]) -> List[str]:
+    resource_type = convert_resource_type(resource['Type'])
+    addresses = [f"{resource_type}.{name}"]
+    if resource_type == 'aws_s3_bucket':
+        properties = resource.get('Properties', {})
+        if 'AccessControl' in properties:
+            addresses.append(f"aws_s3_bucket_acl.{name}_acl")
+        if 'VersioningConfiguration' in properties:
+            addresses.append(f"aws_s3_bucket_versioning.{name}_versioning")
+        if 'ServerSideEncryptionConfiguration' in properties:
+            addresses.append(f"aws_s3_bucket_server_side_encryption_configuration.{name}_encryption")
+    return addresses
+
+# Properties that set a resource's physical name
+NAME_PROPERTIES = {
+    'AWS::S3::Bucket': 'BucketName',
+    'AWS::EC2::SecurityGroup': 'GroupName',
+}
+
+def get_physical_name(resource: Dict[str, Any]) -> Any:
+    value = resource.get('Properties', {}).get(NAME_PROPERTIES.get(resource['Type']))
+    # Names built from Ref/Sub/... aren't known until deploy time
+    if isinstance(value, str) and '${' not in value:
+        return value
+    return None
+
+def build_resource_index(cf_template: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return {
+        name: {
+            "cf_type": resource['Type'],
+            "addresses": get_terraform_addresses(name, resource),
+            "physical_name": get_physical_name(resource)
+        }
+        for name, resource in cf_template.get('Resources', {}).items()
+    }
+
+def merge_resource_index(resource_index: Dict[str, Dict[str, Any]], template_index: Dict[str, Dict[str, Any]], source: str):
+    """Add one template's index to the combined index of an output directory.
+
+    Raises ValueError when another template already declared one of the
+    logical IDs: both would convert to the same Terraform address, and the
+    state step could not tell their resources apart.
+    """
+    for logical_id, entry in template_index.items():
+        if logical_id in resource_index:
+            raise ValueError(f"{logical_id} is declared by both {resource_index[logical_id]['source']} and {source}; convert templates that reuse logical IDs into separate output directories")
+    for logical_id, entry in template_index.items():
+        resource_index[logical_id] = dict(entry, source=source)
+
 def convert_output(name: str, output: Dict[str, Any]) -> str:
     value = convert_property_value(output.get('Value'), 'Output')
     description = output.get('Description', '')
@@ -147,7 +265,55 @@ def convert_output(name: str, output: Dict[str, Any]) -> str:
     
     return '\n'.join(tf_output)
 
-def convert_to_terraform(cf_template: Dict[str, Any]) -> str:
+# With workers=0 (one per CPU), templates with fewer resources than this are
+# converted serially; an explicit worker count always uses the pool. There is
+# no default: on one CPU, 2 workers were slower at every size up to 100000
+# resources, so set CF2TF_PARALLEL_MIN_RESOURCES from
+# benchmarks/bench_parallel_conversion.py runs on the target machine
+PARALLEL_MIN_RESOURCES: Optional[int] = int(os.environ['CF2TF_PARALLEL_MIN_RESOURCES']) if os.environ.get('CF2TF_PARALLEL_MIN_RESOURCES') else None
+# Several shards per worker keep the pool busy when resources vary in size
+SHARDS_PER_WORKER = 4
+
+_shard_resources: List[Tuple[str, Dict[str, Any]]] = []
+
+def _init_shard_worker(resources: List[Tuple[str, Dict[str, Any]]]):
+    global _shard_resources
+    _shard_resources = resources
+    # Keep the garbage collector from repeatedly walking the inherited template
+    gc.freeze()
+
+def use_parallel(cf_template: Dict[str, Any], workers: int) -> bool:
+    if workers:
+        return workers > 1
+    # One worker per CPU: only worth it with several CPUs and a large enough template
+    if (os.cpu_count() or 1) == 1:
+        return False
+    return PARALLEL_MIN_RESOURCES is None or len(cf_template.get('Resources') or {}) >= PARALLEL_MIN_RESOURCES
+
+def convert_resources_sharded(resources: Dict[str, Any], convert_shard: Callable[[Tuple[int, int]], Any], workers: int = None) -> List[Any]:
+    """Split Resources into contiguous shards, convert them on a process pool and
+    return the shard results in template order.
+
+    Each worker receives the resource list once, when it starts, and shards
+    are passed as (start, end) bounds into it. workers of 0 or None uses
+    every CPU.
+    """
+    items = list(resources.items())
+    workers = workers or os.cpu_count()
+    shard_count = min(len(items), workers * SHARDS_PER_WORKER)
+    bounds = [(len(items) * i // shard_count, len(items) * (i + 1) // shard_count) for i in range(shard_count)]
+    with Pool(processes=workers, initializer=_init_shard_worker, initargs=(items,)) as pool:
+        return pool.map(convert_shard, bounds)
+
+def _convert_shard(bounds: Tuple[int, int]) -> str:
+    # Joined here so only one string per shard travels back to the parent
+    lines = []
+    for resource_name, resource_data in _shard_resources[bounds[0]:bounds[1]]:
+        lines.extend(convert_resource(resource_name, resource_data))
+        lines.append("")
+    return '\n'.join(lines)
+
+def convert_to_terraform(cf_template: Dict[str, Any], workers: int = 1) -> str:
     tf_output = []
     
     if 'Parameters' in cf_template:
@@ -165,9 +331,13 @@ def convert_to_terraform(cf_template: Dict[str, Any]) -> str:
 
     if 'Resources' in cf_template:
         tf_output.append("# Resources")
-        for resource_name, resource_data in cf_template['Resources'].items():
-            tf_output.extend(convert_resource(resource_name, resource_data))
-            tf_output.append("")
+        if use_parallel(cf_template, workers):
+            # Joining the shard strings gives the same text as joining every line
+            tf_output.extend(convert_resources_sharded(cf_template['Resources'], _convert_shard, workers))
+        else:
+            for resource_name, resource_data in cf_template['Resources'].items():
+                tf_output.extend(convert_resource(resource_name, resource_data))
+                tf_output.append("")
 
     if 'Outputs' in cf_template:
         tf_output.append("# Outputs")
@@ -177,18 +347,174 @@ def convert_to_terraform(cf_template: Dict[str, Any]) -> str:
 
     return '\n'.join(tf_output)
 
-def process_cf_file(file_path: str) -> Dict[str, Any]:
-    cf_template = load_cloudformation_template(file_path)
-    tf_code = convert_to_terraform(cf_template)
-    security_issues = analyze_security(tf_code)
-    security_report = generate_security_report(tf_code)
+# Terraform JSON (.tf.json) backend: builds the configuration as plain data
+# and serializes it, so values are escaped by the encoder instead of by hand
+
+INTRINSIC_FUNCTIONS = ('Ref', 'Fn::GetAtt', 'Fn::Join', 'Fn::Sub')
+
+def convert_property_value_json(value: Any, property_name: str) -> Any:
+    if isinstance(value, dict):
+        if any(key in value for key in INTRINSIC_FUNCTIONS):
+            # Same ${...} expression the HCL backend emits; in Terraform JSON strings are templates
+            return convert_property_value(value, property_name)
+        return {key: convert_property_value_json(item, key) for key, item in value.items()}
+    elif isinstance(value, list):
+        if property_name == 'SecurityGroups':
+            return [f"${{aws_security_group.{item.lower()}.id}}" for item in value]
+        if property_name == 'Tags' and all(isinstance(tag, dict) and 'Key' in tag for tag in value):
+            # Terraform tags are a map, not a list of Key/Value pairs
+            return {tag['Key']: convert_property_value_json(tag.get('Value'), 'Value') for tag in value}
+        return [convert_property_value_json(item, property_name) for item in value]
+    return value
+
+def convert_resource_json(name: str, resource: Dict[str, Any]) -> List[Tuple[str, str, Dict[str, Any]]]:
+    resource_type = convert_resource_type(resource['Type'])
+    properties = resource.get('Properties', {})
+
+    tf_resources = []
+
+    if resource_type == 'aws_s3_bucket':
+        bucket_ref = f"${{aws_s3_bucket.{name}.id}}"
+        tf_resources.append(('aws_s3_bucket', name, {
+            "bucket": convert_property_value_json(properties.get("BucketName", name), "BucketName")
+        }))
+
+        if 'AccessControl' in properties:
+            tf_resources.append(('aws_s3_bucket_acl', f"{name}_acl", {
+                "bucket": bucket_ref,
+                "acl": convert_property_value_json(properties["AccessControl"], "AccessControl")
+            }))
+
+        if 'VersioningConfiguration' in properties:
+            tf_resources.append(('aws_s3_bucket_versioning', f"{name}_versioning", {
+                "bucket": bucket_ref,
+                "versioning_configuration": {
+                    "status": convert_property_value_json(properties["VersioningConfiguration"]["Status"], "Status")
+                }
+            }))
+
+        if 'ServerSideEncryptionConfiguration' in properties:
+            sse_algorithm = properties["ServerSideEncryptionConfiguration"][0]["ServerSideEncryptionByDefault"]["SSEAlgorithm"]
+            tf_resources.append(('aws_s3_bucket_server_side_encryption_configuration', f"{name}_encryption", {
+                "bucket": bucket_ref,
+                "rule": {
+                    "apply_server_side_encryption_by_default": {
+                        "sse_algorithm": convert_property_value_json(sse_algorithm, "SSEAlgorithm")
+                    }
+                }
+            }))
+    else:
+        tf_resources.append((resource_type, name, {
+            convert_property_name(prop_name): convert_property_value_json(prop_value, prop_name)
+            for prop_name, prop_value in properties.items()
+        }))
+
+    return tf_resources
+
+class EncodedJSON(str):
+    """A block body that was already serialized, emitted as-is by render_terraform_json."""
+
+def _convert_shard_json(bounds: Tuple[int, int]) -> List[Tuple[str, str, str]]:
+    # Bodies are encoded in the worker, so serialization is parallel too
+    return [(resource_type, name, encode_json(body))
+            for resource_name, resource_data in _shard_resources[bounds[0]:bounds[1]]
+            for resource_type, name, body in convert_resource_json(resource_name, resource_data)]
+
+def build_terraform_json(cf_template: Dict[str, Any], workers: int = 1) -> Dict[str, Any]:
+    """Build the Terraform JSON configuration as plain data.
+
+    When the resources are converted in parallel, resource bodies are
+    returned already encoded as EncodedJSON strings.
+    """
+    tf_config = {}
+
+    if 'Parameters' in cf_template:
+        variables = tf_config["variable"] = {}
+        for param_name, param_data in cf_template['Parameters'].items():
+            variable = {}
+            if 'Description' in param_data:
+                variable["description"] = param_data["Description"]
+            variable["type"] = "string"
+            default_value = param_data.get('Default', '')
+            if default_value:
+                variable["default"] = str(default_value)
+            variables[param_name] = variable
+
+    if 'Resources' in cf_template:
+        resources = tf_config["resource"] = {}
+        if use_parallel(cf_template, workers):
+            for shard in convert_resources_sharded(cf_template['Resources'], _convert_shard_json, workers):
+                for resource_type, name, body in shard:
+                    resources.setdefault(resource_type, {})[name] = EncodedJSON(body)
+        else:
+            for resource_name, resource_data in cf_template['Resources'].items():
+                for resource_type, name, body in convert_resource_json(resource_name, resource_data):
+                    resources.setdefault(resource_type, {})[name] = body
+
+    if 'Outputs' in cf_template:
+        outputs = tf_config["output"] = {}
+        for output_name, output_data in cf_template['Outputs'].items():
+            output = {}
+            if output_data.get('Description'):
+                output["description"] = output_data["Description"]
+            output["value"] = convert_property_value_json(output_data.get('Value'), 'Output')
+            outputs[output_name] = output
+
+    return tf_config
+
+# The json module only uses its C encoder when indent is not set
+encode_json = json.JSONEncoder(separators=(',', ':')).encode
+
+def render_terraform_json(value: Any, label_depth: int, indent: str = '') -> str:
+    # Indent the labelled skeleton and write each block body compactly on one
+    # line, which keeps line numbers meaningful for the analyzers
+    if isinstance(value, EncodedJSON):
+        return value
+    if label_depth == 0 or not isinstance(value, dict) or not value:
+        return encode_json(value)
+    inner = indent + '  '
+    members = [f'{inner}{encode_json(key)}: {render_terraform_json(item, label_depth - 1, inner)}' for key, item in value.items()]
+    return '{\n' + ',\n'.join(members) + f'\n{indent}}}'
+
+# Number of labels below each top-level section
+JSON_SECTION_LABELS = {'variable': 1, 'resource': 2, 'output': 1}
+
+def convert_to_terraform_json(cf_template: Dict[str, Any], workers: int = 1) -> str:
+    tf_config = build_terraform_json(cf_template, workers)
+    sections = [f'  {encode_json(section)}: {render_terraform_json(blocks, JSON_SECTION_LABELS[section], "  ")}' for section, blocks in tf_config.items()]
+    return '{\n' + ',\n'.join(sections) + '\n}\n' if sections else '{}\n'
+
+
+OUTPUT_FORMATS = {
+    'hcl': (convert_to_terraform, '.tf'),
+    'json': (convert_to_terraform_json, '.tf.json'),
+}
+
+def process_cf_file(file_path: str, output_format: str = 'hcl', workers: int = 1, parameter_values: Dict[str, str] = None) -> Dict[str, Any]:
+    return process_cf_template(load_cloudformation_template(file_path), output_format, workers, parameter_values)
+
+def process_cf_data(data: Union[str, bytes, IO], output_format: str = 'hcl', workers: int = 1, parameter_values: Dict[str, str] = None) -> Dict[str, Any]:
+    return process_cf_template(load_cloudformation_data(data), output_format, workers, parameter_values)
+
+def process_cf_template(cf_template: Dict[str, Any], output_format: str = 'hcl', workers: int = 1, parameter_values: Dict[str, str] = None) -> Dict[str, Any]:
+    if parameter_values is not None:
+        # Convert, analyze and index only what is active for these parameter values
+        cf_template = specialize_template(cf_template, parameter_values)
+    convert, _ = OUTPUT_FORMATS[output_format]
+    tf_code = convert(cf_template, workers)
+    # Parsed once; the analysis and the docs step both work from this tree
+    tf_tree = parse_terraform(tf_code)
+    security_issues = analyze_security(tf_code, tf_tree)
+    security_report = generate_security_report(tf_code, security_issues)
     security_score = get_security_score(security_issues)
     
     return {
         "terraform_code": tf_code,
+        "terraform_tree": tf_tree,
         "security_report": security_report,
         "security_score": security_score,
-        "security_issues": security_issues
+        "security_issues": security_issues,
+        "resource_index": build_resource_index(cf_template)
     }
 
 if __name__ == "__main__":
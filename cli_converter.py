@@ -1,16 +1,28 @@
 import os
 import sys
+import json
 import argparse
 import zipfile
-from cf_to_tf_converter import process_cf_file
+from cf_to_tf_converter import process_cf_file, merge_resource_index, OUTPUT_FORMATS
 from docs_generator import generate_docs, save_docs
-from state_file_generator import generate_state_file
+from state_file_generator import generate_state_file, generate_state_from_exports, generate_import_blocks, build_inventory_scope
 from diff_tool import generate_diff_report
+from aws_scheduler import RequestScheduler
+from template_specializer import load_parameter_values
 
-def convert_files(input_path, output_dir, regions):
+def convert_files(input_path, output_dir, regions, stack_exports=None, import_blocks=False, checkpoint_dir=None, max_age=None, output_format='hcl', workers=1, parameter_values=None, resume=False, stack_names=None):
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
+    resource_index = {}
+
+    def convert_and_index(file_path):
+        try:
+            merge_resource_index(resource_index, convert_single_file(file_path, output_dir, output_format, workers, parameter_values), file_path)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
     if os.path.isfile(input_path):
         if input_path.endswith('.zip'):
             with zipfile.ZipFile(input_path, 'r') as zip_ref:
@@ -18,38 +30,63 @@ def convert_files(input_path, output_dir, regions):
             for root, _, files in os.walk(output_dir):
                 for file in files:
                     if file.endswith(('.yaml', '.yml', '.json')):
-                        file_path = os.path.join(root, file)
-                        convert_single_file(file_path, output_dir)
+                        convert_and_index(os.path.join(root, file))
         else:
-            convert_single_file(input_path, output_dir)
+            convert_and_index(input_path)
     elif os.path.isdir(input_path):
         for root, _, files in os.walk(input_path):
             for file in files:
                 if file.endswith(('.yaml', '.yml', '.json')):
-                    file_path = os.path.join(root, file)
-                    convert_single_file(file_path, output_dir)
+                    convert_and_index(os.path.join(root, file))
     else:
         print(f"Error: {input_path} is not a valid file or directory")
         sys.exit(1)
 
+    if stack_exports:
+        # Build state offline from the exported stack resources
+        try:
+            if import_blocks:
+                output_path = os.path.join(output_dir, 'imports.tf')
+                output = generate_import_blocks(stack_exports, resource_index)
+            else:
+                output_path = os.path.join(output_dir, 'terraform.tfstate')
+                output = generate_state_from_exports(stack_exports, resource_index)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        with open(output_path, 'w') as f:
+            f.write(output)
+        print(f"State generated from stack exports: {output_path}")
+        return
+
     # Generate state file
-    resource_types = ["aws_s3_bucket", "aws_ec2_instance", "aws_vpc", "aws_subnet", "aws_security_group"]
-    state_file = generate_state_file(regions, resource_types)
+    # Only inventory the types, logical IDs and names the converted templates declare
+    scope = build_inventory_scope(resource_index, stack_names)
+    if scope and not stack_names:
+        print("Without --stack-name, resources are matched on logical ID alone and may come from other stacks; buckets without a BucketName are skipped")
+    scheduler = RequestScheduler()
+    state_file = generate_state_file(regions, list(scope), scheduler, checkpoint_dir=checkpoint_dir, max_age=max_age, scope=scope, resume=resume)
     state_file_path = os.path.join(output_dir, 'terraform.tfstate')
     with open(state_file_path, 'w') as f:
         f.write(state_file)
     print(f"State file generated: {state_file_path}")
+    if scheduler.failures:
+        failures_path = os.path.join(output_dir, 'state_fetch_failures.json')
+        with open(failures_path, 'w') as f:
+            json.dump(scheduler.failures, f, indent=2)
+        print(f"Resources that could not be fetched are listed in {failures_path}")
 
-def convert_single_file(file_path, output_dir):
+def convert_single_file(file_path, output_dir, output_format='hcl', workers=1, parameter_values=None):
     try:
-        result = process_cf_file(file_path)
+        result = process_cf_file(file_path, output_format, workers, parameter_values)
         tf_output = result["terraform_code"]
         security_report = result["security_report"]
         security_score = result["security_score"]
         security_issues = result["security_issues"]
 
         output_filename = os.path.splitext(os.path.basename(file_path))[0]
-        tf_output_path = os.path.join(output_dir, f"{output_filename}.tf")
+        _, tf_extension = OUTPUT_FORMATS[output_format]
+        tf_output_path = os.path.join(output_dir, f"{output_filename}{tf_extension}")
         report_output_path = os.path.join(output_dir, f"{output_filename}_security_report.txt")
         docs_output_path = os.path.join(output_dir, f"{output_filename}_docs.md")
         diff_output_path = os.path.join(output_dir, f"{output_filename}_diff.txt")
@@ -61,12 +98,12 @@ def convert_single_file(file_path, output_dir):
             f.write(security_report)
 
         # Generate and save documentation
-        docs = generate_docs(tf_output, security_issues)
+        docs = generate_docs(tf_output, security_issues, result["terraform_tree"])
         save_docs(docs, docs_output_path)
 
         # Generate diff report
         with open(file_path, 'r') as cf_file, open(tf_output_path, 'r') as tf_file:
-            diff_report = generate_diff_report(cf_file.read(), tf_file.read())
+            diff_report = generate_diff_report(cf_file.read(), tf_file.read(), output_format, parameter_values)
         with open(diff_output_path, 'w') as f:
             f.write(diff_report)
 
@@ -75,20 +112,34 @@ def convert_single_file(file_path, output_dir):
         print(f"Documentation saved to {docs_output_path}")
         print(f"Diff report saved to {diff_output_path}")
         print(f"Security Score: {security_score}/100")
+        return result["resource_index"]
     except Exception as e:
         print(f"Error converting {file_path}: {str(e)}")
+        return {}
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description='Convert CloudFormation templates to Terraform')
     parser.add_argument('input', help='Input file or directory path')
     parser.add_argument('-o', '--output', default='converted_files', help='Output directory (default: converted_files)')
     parser.add_argument('-r', '--regions', nargs='+', default=['us-west-2'], help='AWS regions for state file generation (default: us-west-2)')
-    args = parser.parse_args()
+    parser.add_argument('-f', '--format', choices=sorted(OUTPUT_FORMATS), default='hcl', help='Terraform output syntax: native HCL (.tf) or JSON (.tf.json) (default: hcl)')
+    parser.add_argument('-j', '--workers', type=int, default=1, help='Worker processes for converting each template; 0 uses one per CPU and, if CF2TF_PARALLEL_MIN_RESOURCES is set, only for templates with at least that many resources (default: 1)')
+    parser.add_argument('-p', '--parameters', help='Parameter values (JSON or YAML) to specialize templates for; resources, outputs and Fn::If branches whose conditions are false are dropped')
+    parser.add_argument('--stack-export', nargs='+', help='describe-stack-resources / list-stack-resources JSON exports to build state from offline instead of scanning AWS')
+    parser.add_argument('--import-blocks', action='store_true', help='With --stack-export, write Terraform import blocks (imports.tf) instead of a state file')
+    parser.add_argument('--stack-name', nargs='+', help='CloudFormation stacks the templates are deployed as; live inventory is limited to their resources')
+    parser.add_argument('--checkpoint-dir', help='Directory for inventory checkpoints (default: <output>/.inventory_checkpoint)')
+    parser.add_argument('--resume', action='store_true', help='Reuse inventory partitions checkpointed by an earlier (e.g. interrupted) run instead of fetching them again')
+    parser.add_argument('--max-age', type=float, default=None, help='With --resume, refetch checkpointed partitions older than this many seconds (default: reuse any checkpoint)')
+    args = parser.parse_args(argv)
 
     input_path = os.path.abspath(args.input)
     output_dir = os.path.abspath(args.output)
 
-    convert_files(input_path, output_dir, args.regions)
+    stack_exports = [os.path.abspath(path) for path in args.stack_export] if args.stack_export else None
+    checkpoint_dir = os.path.abspath(args.checkpoint_dir) if args.checkpoint_dir else os.path.join(output_dir, '.inventory_checkpoint')
+    parameter_values = load_parameter_values(args.parameters) if args.parameters else None
+    convert_files(input_path, output_dir, args.regions, stack_exports, args.import_blocks, checkpoint_dir, args.max_age, args.format, args.workers, parameter_values, args.resume, args.stack_name)
     print(f"Conversion complete. Converted files are in {output_dir}")
 
 if __name__ == '__main__':
@@ -0,0 +1,165 @@
+import os
+import io
+import sys
+import json
+import argparse
+import traceback
+import socketserver
+from contextlib import redirect_stdout, redirect_stderr
+from typing import List
+import cli_converter
+import security_scanner
+from cf_to_tf_converter import process_cf_data
+from docs_generator import generate_docs, save_docs
+from security_analyzer import analyze_security
+from hcl_parser import parse_terraform
+from cf2tf_client import DEFAULT_SOCKET, send_request, check_private_dir
+
+WARM_UP_TEMPLATE = """
+Resources:
+  Bucket:
+    Type: AWS::S3::Bucket
+    Properties:
+      BucketName: !Sub "${AWS::StackName}-bucket"
+"""
+
+def docs_main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='Generate Markdown documentation for Terraform code')
+    parser.add_argument('input', help='Terraform file (.tf or .tf.json)')
+    parser.add_argument('-o', '--output', help='Documentation file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    with open(args.input, 'r') as f:
+        terraform_code = f.read()
+    tree = parse_terraform(terraform_code)
+    docs = generate_docs(terraform_code, analyze_security(terraform_code, tree), tree)
+    if args.output:
+        save_docs(docs, args.output)
+    else:
+        print(docs)
+
+# Command name -> (program name shown in usage messages, entry point)
+COMMANDS = {
+    'convert': ('cli_converter.py', cli_converter.main),
+    'analyze': ('security_scanner.py', security_scanner.main),
+    'docs': ('cf2tf_client.py docs', docs_main),
+}
+
+def run_command(command: str, args: List[str]) -> int:
+    """Run a CLI command in this process and return its exit code."""
+    prog, entry_point = COMMANDS[command]
+    argv = sys.argv
+    sys.argv = [prog] + args
+    try:
+        entry_point(args)
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    finally:
+        sys.argv = argv
+    return 0
+
+class ConversionHandler(socketserver.StreamRequestHandler):
+    """Runs one forwarded command per connection and replies with its output and exit code."""
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            command = request["command"]
+        except (ValueError, KeyError, TypeError):
+            self.respond("", "Malformed request\n", 2)
+            return
+
+        if command == 'ping':
+            self.respond("", "", 0)
+            return
+        if command == 'stop':
+            self.server.stopping = True
+            self.respond("", "", 0)
+            return
+        if command not in COMMANDS:
+            self.respond("", f"Unknown command: {command}\n", 2)
+            return
+
+        # Requests are served one at a time, so redirecting output and
+        # changing directory for the duration of a command is safe
+        stdout, stderr = io.StringIO(), io.StringIO()
+        daemon_cwd = os.getcwd()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                os.chdir(request.get("cwd") or daemon_cwd)
+                exit_code = run_command(command, request.get("args", []))
+            except Exception:
+                traceback.print_exc()
+                exit_code = 1
+            finally:
+                os.chdir(daemon_cwd)
+        self.respond(stdout.getvalue(), stderr.getvalue(), exit_code)
+
+    def respond(self, stdout: str, stderr: str, exit_code: int):
+        self.wfile.write(json.dumps({"stdout": stdout, "stderr": stderr, "exit_code": exit_code}).encode('utf-8'))
+
+def warm_up():
+    # Run a tiny template through the loader, converter, rules and docs so the first request is as fast as the rest
+    result = process_cf_data(WARM_UP_TEMPLATE)
+    generate_docs(result["terraform_code"], result["security_issues"], result["terraform_tree"])
+
+def serve(socket_path: str = DEFAULT_SOCKET):
+    """Serve forwarded commands on a Unix socket until a stop request or Ctrl-C."""
+    socket_dir = os.path.dirname(os.path.abspath(socket_path))
+    try:
+        # The directory is what keeps other users from binding the socket first
+        if not os.path.isdir(socket_dir):
+            os.mkdir(socket_dir, 0o700)
+        check_private_dir(socket_dir)
+    except OSError as e:
+        print(f"Cannot use {socket_dir} for the daemon socket: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if os.path.lexists(socket_path):
+        try:
+            send_request({"command": "ping"}, socket_path)
+        except PermissionError as e:
+            print(f"Refusing to use {socket_path}: {e}", file=sys.stderr)
+            sys.exit(1)
+        except OSError:
+            # Left behind by a daemon that did not shut down cleanly
+            try:
+                os.remove(socket_path)
+            except OSError as e:
+                print(f"Cannot remove stale socket {socket_path}: {e}", file=sys.stderr)
+                sys.exit(1)
+        else:
+            print(f"A daemon is already listening on {socket_path}", file=sys.stderr)
+            sys.exit(1)
+
+    warm_up()
+    # Only the owner may connect; commands run with the daemon's permissions
+    previous_umask = os.umask(0o177)
+    try:
+        server = socketserver.UnixStreamServer(socket_path, ConversionHandler)
+    finally:
+        os.umask(previous_umask)
+    server.stopping = False
+
+    print(f"Conversion daemon listening on {socket_path}", file=sys.stderr)
+    try:
+        with server:
+            while not server.stopping:
+                server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+def main():
+    parser = argparse.ArgumentParser(description='Keep the converter loaded and serve convert, analyze and docs requests from cf2tf_client.py')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help=f'Unix socket to listen on, in a directory only this user can write to (default: {DEFAULT_SOCKET})')
+    args = parser.parse_args()
+    serve(args.socket)
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,14 @@
 import difflib
-from cf_to_tf_converter import convert_to_terraform, load_cloudformation_template
+from cf_to_tf_converter import load_cloudformation_content, OUTPUT_FORMATS
+from template_specializer import specialize_template
 
-def compare_cf_tf(cf_content, tf_content):
+def compare_cf_tf(cf_content, tf_content, output_format='hcl', parameter_values=None):
     # Convert CloudFormation to Terraform
-    cf_template = load_cloudformation_template(cf_content)
-    cf_as_tf = convert_to_terraform(cf_template)
+    cf_template = load_cloudformation_content(cf_content)
+    if parameter_values is not None:
+        cf_template = specialize_template(cf_template, parameter_values)
+    convert, _ = OUTPUT_FORMATS[output_format]
+    cf_as_tf = convert(cf_template)
 
     # Compare
     diff = difflib.unified_diff(
@@ -16,8 +20,8 @@ def compare_cf_tf(cf_content, tf_content):
 
     return ''.join(diff)
 
-def generate_diff_report(cf_content, tf_content):
-    diff = compare_cf_tf(cf_content, tf_content)
+def generate_diff_report(cf_content, tf_content, output_format='hcl', parameter_values=None):
+    diff = compare_cf_tf(cf_content, tf_content, output_format, parameter_values)
     report = f"Diff between converted CloudFormation and existing Terraform:\n\n{diff}"
     return report
 
@@ -1,13 +1,14 @@
-import re
 from typing import List, Dict, Any
+from hcl_parser import parse_terraform, unquote
 
-def generate_docs(terraform_code: str, security_issues: List[Dict[str, Any]]) -> str:
-    """Generate documentation for the converted Terraform code."""
+def generate_docs(terraform_code: str, security_issues: List[Dict[str, Any]], tree: Dict[str, Any] = None) -> str:
+    """Generate documentation for the converted Terraform code, reusing its parse tree if given."""
     docs = ["# Terraform Configuration Documentation\n"]
     
     # Add a section for resources
     docs.append("## Resources\n")
-    resources = parse_resources(terraform_code)
+    tree = tree or parse_terraform(terraform_code)
+    resources = parse_resources(terraform_code, tree)
     for resource_type, resource_names in resources.items():
         docs.append(f"### {resource_type}\n")
         for name in resource_names:
@@ -15,7 +16,7 @@ def generate_docs(terraform_code: str, security_issues: List[Dict[str, Any]]) ->
         docs.append("\n")
     
     # Add a section for variables
-    variables = parse_variables(terraform_code)
+    variables = parse_variables(terraform_code, tree)
     if variables:
         docs.append("## Variables\n")
         for var_name, var_details in variables.items():
@@ -29,7 +30,7 @@ def generate_docs(terraform_code: str, security_issues: List[Dict[str, Any]]) ->
             docs.append("\n")
 
     # Add a section for outputs
-    outputs = parse_outputs(terraform_code)
+    outputs = parse_outputs(terraform_code, tree)
     if outputs:
         docs.append("## Outputs\n")
         for output_name, output_details in outputs.items():
@@ -51,43 +52,50 @@ def generate_docs(terraform_code: str, security_issues: List[Dict[str, Any]]) ->
     
     return "\n".join(docs)
 
-def parse_resources(terraform_code: str) -> Dict[str, List[str]]:
+def parse_resources(terraform_code: str, tree: Dict[str, Any] = None) -> Dict[str, List[str]]:
     """Parse the Terraform code to extract resource types and names."""
     resources = {}
-    resource_pattern = r'resource\s+"(\w+)"\s+"(\w+)"\s+{'
-    for match in re.finditer(resource_pattern, terraform_code):
-        resource_type, resource_name = match.groups()
-        if resource_type not in resources:
-            resources[resource_type] = []
-        resources[resource_type].append(resource_name)
+    tree = tree or parse_terraform(terraform_code)
+    for block in tree["blocks"]:
+        if block["type"] == 'resource' and len(block["labels"]) == 2:
+            resource_type, resource_name = block["labels"]
+            if resource_type not in resources:
+                resources[resource_type] = []
+            resources[resource_type].append(resource_name)
     return resources
 
-def parse_variables(terraform_code: str) -> Dict[str, Dict[str, str]]:
+def parse_variables(terraform_code: str, tree: Dict[str, Any] = None) -> Dict[str, Dict[str, str]]:
     """Parse the Terraform code to extract variables."""
     variables = {}
-    variable_pattern = r'variable\s+"(\w+)"\s+{([^}]*)}'
-    for match in re.finditer(variable_pattern, terraform_code, re.DOTALL):
-        var_name, var_block = match.groups()
+    tree = tree or parse_terraform(terraform_code)
+    for block in tree["blocks"]:
+        if block["type"] != 'variable' or not block["labels"]:
+            continue
+        var_name = block["labels"][0]
+        attributes = block["attributes"]
         variables[var_name] = {}
-        if 'description' in var_block:
-            variables[var_name]['description'] = re.search(r'description\s*=\s*"([^"]*)"', var_block).group(1)
-        if 'type' in var_block:
-            variables[var_name]['type'] = re.search(r'type\s*=\s*(\w+)', var_block).group(1)
-        if 'default' in var_block:
-            variables[var_name]['default'] = re.search(r'default\s*=\s*([^\n]+)', var_block).group(1)
+        if 'description' in attributes:
+            variables[var_name]['description'] = unquote(attributes['description']['value'])
+        if 'type' in attributes:
+            variables[var_name]['type'] = unquote(attributes['type']['value'])
+        if 'default' in attributes:
+            variables[var_name]['default'] = attributes['default']['value']
     return variables
 
-def parse_outputs(terraform_code: str) -> Dict[str, Dict[str, str]]:
+def parse_outputs(terraform_code: str, tree: Dict[str, Any] = None) -> Dict[str, Dict[str, str]]:
     """Parse the Terraform code to extract outputs."""
     outputs = {}
-    output_pattern = r'output\s+"(\w+)"\s+{([^}]*)}'
-    for match in re.finditer(output_pattern, terraform_code, re.DOTALL):
-        output_name, output_block = match.groups()
+    tree = tree or parse_terraform(terraform_code)
+    for block in tree["blocks"]:
+        if block["type"] != 'output' or not block["labels"]:
+            continue
+        output_name = block["labels"][0]
+        attributes = block["attributes"]
         outputs[output_name] = {}
-        if 'description' in output_block:
-            outputs[output_name]['description'] = re.search(r'description\s*=\s*"([^"]*)"', output_block).group(1)
-        if 'value' in output_block:
-            outputs[output_name]['value'] = re.search(r'value\s*=\s*([^\n]+)', output_block).group(1)
+        if 'description' in attributes:
+            outputs[output_name]['description'] = unquote(attributes['description']['value'])
+        if 'value' in attributes:
+            outputs[output_name]['value'] = attributes['value']['value']
     return outputs
 
 def save_docs(docs: str, output_path: str):
@@ -0,0 +1,336 @@
+import re
+import json
+from typing import List, Dict, Any, Iterator, Tuple
+
+# Token kinds
+IDENT = 'ident'
+STRING = 'string'
+HEREDOC = 'heredoc'
+NUMBER = 'number'
+PUNCT = 'punct'
+OPEN = 'open'
+CLOSE = 'close'
+ASSIGN = 'assign'
+NEWLINE = 'newline'
+OTHER = 'other'
+
+
+# A single alternation is matched at each position, so tokenizing is one pass
+# over the input. Strings without interpolation are matched directly; the rest
+# fall through to 'quote' and are scanned by _skip_string. Single-quoted
+# literals are not HCL but are kept whole so their braces stay balanced.
+TOKEN_PATTERN = re.compile(r"""[ \t\r]*(?:
+     (?P<newline>\n)
+    |(?P<comment>(?:\#|//)[^\n]*|/\*.*?(?:\*/|\Z))
+    |(?P<string>"(?:[^"\\\n$%]|\\.|\$\$\{|%%\{|[$%](?!\{))*")
+    |(?P<quote>")
+    |(?P<heredoc><<-?(?P<marker>[A-Za-z_][\w-]*)[ \t]*\n)
+    |(?P<ident>[A-Za-z_][\w-]*)
+    |(?P<number>\d[\w.]*)
+    |(?P<open>[{\[(])
+    |(?P<close>[}\])])
+    |(?P<punct>==|!=|<=|>=|&&|\|\||=>|::|[,.:?!<>+\-*/%&|])
+    |(?P<assign>=)
+    |(?P<other>'(?:[^'\\\n]|\\.)*'?|.)
+)?""", re.VERBOSE | re.DOTALL)
+
+Token = Tuple[str, int, int, int]  # (kind, start, end, line)
+
+def _skip_string(text: str, pos: int) -> int:
+    """Skip a quoted string starting just after its opening quote.
+
+    Interpolations may nest further strings, so open strings and ${...}
+    or %{...} templates are tracked on an explicit stack rather than by
+    recursion. Neither may span lines: anything still open at the end of
+    the line is treated as unterminated and ends there.
+    """
+    # Each entry is None for an open string or the brace depth of an open template
+    stack = [None]
+    n = len(text)
+    while pos < n:
+        c = text[pos]
+        if c == '\n':
+            return pos
+        if stack[-1] is None:
+            if c == '\\':
+                pos += 2
+                continue
+            if c == '"':
+                stack.pop()
+                if not stack:
+                    return pos + 1
+            elif c in '$%' and text.startswith(c + '{', pos + 1):
+                # $${ and %%{ are literal escapes
+                pos += 3
+                continue
+            elif c in '$%' and text.startswith('{', pos + 1):
+                stack.append(1)
+                pos += 2
+                continue
+        elif c == '"':
+            stack.append(None)
+        elif c == '{':
+            stack[-1] += 1
+        elif c == '}':
+            stack[-1] -= 1
+            if not stack[-1]:
+                stack.pop()
+        pos += 1
+    return pos
+
+def tokenize(text: str) -> Iterator[Token]:
+    """Incrementally tokenize HCL source in a single left-to-right pass."""
+    pos = 0
+    line = 1
+    n = len(text)
+    match_token = TOKEN_PATTERN.match
+    while pos < n:
+        match = match_token(text, pos)
+        kind = match.lastgroup
+        if kind is None:
+            # Only trailing whitespace was left
+            break
+        start = match.start(kind)
+        pos = match.end()
+        if kind == NEWLINE:
+            yield (NEWLINE, start, pos, line)
+            line += 1
+        elif kind == 'comment':
+            line += text.count('\n', start, pos)
+        elif kind == 'quote':
+            # String with interpolations, which may nest further strings
+            pos = _skip_string(text, pos)
+            yield (STRING, start, pos, line)
+        elif kind == HEREDOC:
+            start_line = line
+            marker = match.group('marker')
+            pos -= 1
+            while pos < n:
+                line += 1
+                next_eol = text.find('\n', pos + 1)
+                next_eol = n if next_eol == -1 else next_eol
+                if text[pos + 1:next_eol].strip() == marker:
+                    pos = next_eol
+                    break
+                pos = next_eol
+            yield (HEREDOC, start, pos, start_line)
+        else:
+            yield (kind, start, pos, line)
+
+def _new_body(block_type: str = '', labels: List[str] = None, line: int = 0) -> Dict[str, Any]:
+    return {"type": block_type, "labels": labels or [], "line": line, "end_line": line, "attributes": {}, "blocks": []}
+
+# Parser states
+_BODY = 0
+_NAME = 1
+_LABELS = 2
+_EXPRESSION = 3
+
+def parse_hcl(text: str) -> Dict[str, Any]:
+    """Parse HCL source into a block tree.
+
+    Every node has a type, labels, start and end line, a dict of attributes
+    (raw expression source plus line number) and a list of nested blocks.
+    Tokens are consumed one at a time as the tokenizer produces them, and
+    attribute values are kept as raw source slices rather than re-parsed.
+    """
+    root = _new_body(line=1)
+    stack = [root]
+    body = root
+    state = _BODY
+    name = None
+    name_line = 0
+    labels = []
+    depth = 0
+    expr_start = expr_end = -1
+
+    for kind, start, end, line in tokenize(text):
+        if state == _EXPRESSION:
+            if kind == NEWLINE and depth == 0:
+                body["attributes"][name] = {"value": text[expr_start:expr_end], "line": name_line}
+                state = _BODY
+                continue
+            if kind == OPEN:
+                depth += 1
+            elif kind == CLOSE:
+                if depth == 0:
+                    # Closing brace of a single-line block ends the expression too
+                    body["attributes"][name] = {"value": text[expr_start:expr_end], "line": name_line}
+                    state = _BODY
+                else:
+                    depth -= 1
+            if state == _EXPRESSION:
+                if kind != NEWLINE:
+                    if expr_start < 0:
+                        expr_start = start
+                    expr_end = end
+                continue
+
+        if state == _NAME:
+            if kind == ASSIGN:
+                state = _EXPRESSION
+                depth = 0
+                expr_start = expr_end = -1
+                continue
+            labels = []
+            state = _LABELS
+
+        if state == _LABELS:
+            if kind == STRING or kind == IDENT:
+                labels.append(unquote(text[start:end]))
+                continue
+            state = _BODY
+            if kind == OPEN and text[start] == '{':
+                block = _new_body(name, labels, name_line)
+                body["blocks"].append(block)
+                stack.append(block)
+                body = block
+                continue
+
+        if kind == IDENT:
+            name = text[start:end]
+            name_line = line
+            state = _NAME
+        elif kind == CLOSE and text[start] == '}' and len(stack) > 1:
+            body["end_line"] = line
+            stack.pop()
+            body = stack[-1]
+
+    if state == _EXPRESSION:
+        body["attributes"][name] = {"value": text[expr_start:expr_end], "line": name_line}
+    root["end_line"] = text.count('\n') + 1
+    return root
+
+# Terraform JSON syntax (.tf.json) is parsed into the same block tree. Only the
+# labelled skeleton is walked here; block bodies are decoded by the C JSON
+# decoder, so attributes get the line of the block they belong to.
+
+WHITESPACE = re.compile(r'\s*')
+encode_json = json.JSONEncoder().encode
+
+# Top-level keys whose children are labelled blocks, with the number of labels
+JSON_LABELLED_BLOCKS = {'resource': 2, 'data': 2, 'variable': 1, 'output': 1, 'module': 1, 'provider': 1}
+
+def _json_block(block_type: str, labels: List[str], line: int, end_line: int, body: Any) -> Dict[str, Any]:
+    block = _new_body(block_type, labels, line)
+    block["end_line"] = end_line
+    for key, value in body.items() if isinstance(body, dict) else []:
+        if isinstance(value, dict):
+            block["blocks"].append(_json_block(key, [], line, end_line, value))
+        elif isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+            # A list of objects is a repeated nested block
+            for item in value:
+                block["blocks"].append(_json_block(key, [], line, end_line, item))
+        else:
+            block["attributes"][key] = {"value": encode_json(value), "line": line}
+    return block
+
+def parse_tf_json(text: str) -> Dict[str, Any]:
+    """Parse Terraform JSON syntax into the same block tree parse_hcl builds.
+
+    Objects nested in a block are treated as nested blocks, so map-valued
+    attributes such as tags show up as blocks rather than attributes.
+    """
+    decoder = json.JSONDecoder()
+    root = _new_body(line=1)
+    root["end_line"] = text.count('\n') + 1
+    line_state = [0, 1]
+
+    def line_at(pos: int) -> int:
+        # Positions only move forward, so count newlines incrementally
+        line_state[1] += text.count('\n', line_state[0], pos)
+        line_state[0] = pos
+        return line_state[1]
+
+    def walk_object(pos: int, on_member) -> int:
+        pos = WHITESPACE.match(text, pos).end()
+        if not text.startswith('{', pos):
+            raise ValueError("Expected a JSON object")
+        pos = WHITESPACE.match(text, pos + 1).end()
+        while not text.startswith('}', pos):
+            key, pos = decoder.raw_decode(text, pos)
+            key_line = line_at(pos)
+            pos = WHITESPACE.match(text, pos).end()
+            if not text.startswith(':', pos):
+                raise ValueError("Expected ':' in JSON object")
+            pos = on_member(key, key_line, WHITESPACE.match(text, pos + 1).end())
+            pos = WHITESPACE.match(text, pos).end()
+            if text.startswith(',', pos):
+                pos = WHITESPACE.match(text, pos + 1).end()
+        return pos + 1
+
+    def labelled(block_type: str, depth: int, labels: List[str]):
+        def on_member(key: str, key_line: int, pos: int) -> int:
+            if depth > 1:
+                return walk_object(pos, labelled(block_type, depth - 1, labels + [key]))
+            body, end = decoder.raw_decode(text, pos)
+            root["blocks"].append(_json_block(block_type, labels + [key], key_line, line_at(end), body))
+            return end
+        return on_member
+
+    def top_level(key: str, key_line: int, pos: int) -> int:
+        if key in JSON_LABELLED_BLOCKS:
+            return walk_object(pos, labelled(key, JSON_LABELLED_BLOCKS[key], []))
+        body, end = decoder.raw_decode(text, pos)
+        root["blocks"].append(_json_block(key, [], key_line, line_at(end), body))
+        return end
+
+    try:
+        walk_object(0, top_level)
+    except (ValueError, IndexError):
+        # Keep whatever was parsed before the malformed part, like parse_hcl does
+        pass
+    return root
+
+def parse_terraform(text: str) -> Dict[str, Any]:
+    """Parse Terraform code in either native (.tf) or JSON (.tf.json) syntax."""
+    if text.lstrip().startswith('{'):
+        return parse_tf_json(text)
+    return parse_hcl(text)
+
+def unquote(value: str) -> str:
+    """Strip the surrounding quotes from a string literal, leaving other expressions untouched."""
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return value[1:-1]
+    return value
+
+def iter_blocks(node: Dict[str, Any], block_type: str = None) -> Iterator[Dict[str, Any]]:
+    """Yield every block below node depth-first, optionally filtered by block type."""
+    stack = list(reversed(node["blocks"]))
+    while stack:
+        block = stack.pop()
+        if block_type is None or block["type"] == block_type:
+            yield block
+        stack.extend(reversed(block["blocks"]))
+
+def iter_attributes(node: Dict[str, Any], name: str) -> Iterator[Dict[str, Any]]:
+    """Yield every attribute with the given name in node and all of its nested blocks."""
+    if name in node["attributes"]:
+        yield node["attributes"][name]
+    for block in iter_blocks(node):
+        if name in block["attributes"]:
+            yield block["attributes"][name]
+
+if __name__ == "__main__":
+    # For testing purposes
+    test_code = """
+    variable "example_var" {
+      description = "An example variable"
+      type        = string
+      default     = "example"
+    }
+
+    resource "aws_security_group" "example" {
+      name = "allow_all"
+      ingress {
+        cidr_blocks = ["0.0.0.0/0"]
+      }
+      tags = {
+        Name = "${var.example_var}-sg"
+      }
+    }
+    """
+
+    tree = parse_hcl(test_code)
+    for block in iter_blocks(tree):
+        print(block["line"], block["type"], block["labels"], {k: v["value"] for k, v in block["attributes"].items()})
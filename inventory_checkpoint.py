@@ -0,0 +1,50 @@
+import os
+import json
+import time
+import tempfile
+from typing import List, Dict, Any, Optional
+
+def checkpoint_path(checkpoint_dir: str, region: str, resource_type: str) -> str:
+    return os.path.join(checkpoint_dir, region, f"{resource_type}.json")
+
+def load_checkpoint(checkpoint_dir: str, region: str, resource_type: str, max_age: float = None,
+                    scope: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+    """Return the checkpoint for a partition (its resources plus fetched_at), or None if
+    missing, unreadable, older than max_age seconds or fetched for a different scope."""
+    path = checkpoint_path(checkpoint_dir, region, resource_type)
+    try:
+        with open(path, 'r') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if max_age is not None and time.time() - checkpoint.get('fetched_at', 0) > max_age:
+        return None
+    if checkpoint.get('scope') != scope or not isinstance(checkpoint.get('resources'), list):
+        return None
+    return checkpoint
+
+def format_age(seconds: float) -> str:
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds >= 2 * size:
+            return f"{int(seconds // size)}{unit}"
+    return f"{int(seconds)}s"
+
+def save_checkpoint(checkpoint_dir: str, region: str, resource_type: str, resources: List[Dict[str, Any]], scope: Dict[str, Any] = None):
+    """Persist a partition atomically so an interrupted run never leaves a half-written checkpoint."""
+    path = checkpoint_path(checkpoint_dir, region, resource_type)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    checkpoint = {
+        "region": region,
+        "resource_type": resource_type,
+        "fetched_at": time.time(),
+        "scope": scope,
+        "resources": resources
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
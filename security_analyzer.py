@@ -1,77 +1,105 @@
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Callable, Optional
+from hcl_parser import parse_terraform, iter_blocks, iter_attributes, unquote
 
-def analyze_security(terraform_code: str) -> List[Dict[str, Any]]:
+# Matches both `key = "..."` and the JSON syntax `"key": "..."`; group 1 is the attribute name
+SECRET_PATTERN = re.compile(r'([\w-]*(?:password|secret|key))"?\s*[=:]\s*"[^"]*"', re.IGNORECASE)
+
+def _first(items: Iterator[Dict[str, Any]], predicate: Callable[[Dict[str, Any]], bool] = None) -> Optional[Dict[str, Any]]:
+    return next((item for item in items if predicate is None or predicate(item)), None)
+
+def _allows_any_cidr(block: Dict[str, Any]) -> bool:
+    return '"0.0.0.0/0"' in block["attributes"].get('cidr_blocks', {}).get('value', '')
+
+def analyze_security(terraform_code: str, tree: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    """Check Terraform code for common security issues.
+
+    Pass the code's parse tree if the caller already has one; parsing is
+    most of the cost.
+    """
     issues = []
 
     # Check for hardcoded secrets
-    secret_pattern = r'(password|secret|key)\s*=\s*"[^"]*"'
-    for match in re.finditer(secret_pattern, terraform_code, re.IGNORECASE):
+    for match in SECRET_PATTERN.finditer(terraform_code):
         issues.append({
             "severity": "High",
             "type": "Hardcoded Secret",
             "description": f"Potential hardcoded secret detected: {match.group(0)}",
-            "line": terraform_code.count('\n', 0, match.start()) + 1
+            "line": terraform_code.count('\n', 0, match.start()) + 1,
+            "attribute": match.group(1)
         })
 
+    tree = tree or parse_terraform(terraform_code)
+
     # Check for public S3 buckets
-    if 'acl    = "public-read"' in terraform_code or 'acl    = "public-read-write"' in terraform_code:
+    public_acl = _first(iter_attributes(tree, 'acl'), lambda attr: attr["value"] in ('"public-read"', '"public-read-write"'))
+    if public_acl:
         issues.append({
             "severity": "High",
             "type": "Public S3 Bucket",
             "description": "S3 bucket with public read or read-write access detected",
-            "line": terraform_code.index('acl    = "public-read"') if 'acl    = "public-read"' in terraform_code else terraform_code.index('acl    = "public-read-write"')
+            "line": public_acl["line"]
         })
 
     # Check for unrestricted security group ingress
-    if 'ingress {' in terraform_code and 'cidr_blocks      = ["0.0.0.0/0"]' in terraform_code:
+    open_ingress = _first(iter_blocks(tree, 'ingress'), _allows_any_cidr)
+    if open_ingress:
         issues.append({
             "severity": "Medium",
             "type": "Unrestricted Ingress",
             "description": "Unrestricted security group ingress rule detected",
-            "line": terraform_code.index('ingress {')
+            "line": open_ingress["line"]
         })
 
     # Check for unencrypted resources
-    if 'encrypted        = false' in terraform_code:
+    unencrypted = _first(iter_attributes(tree, 'encrypted'), lambda attr: attr["value"] == 'false')
+    if unencrypted:
         issues.append({
             "severity": "Medium",
             "type": "Unencrypted Resource",
             "description": "Unencrypted resource detected",
-            "line": terraform_code.index('encrypted        = false')
+            "line": unencrypted["line"]
         })
 
     # Check for use of default VPC
-    if 'vpc_id      = aws_default_vpc' in terraform_code:
+    default_vpc = _first(iter_attributes(tree, 'vpc_id'), lambda attr: unquote(attr["value"]).lstrip('${').startswith('aws_default_vpc'))
+    if default_vpc:
         issues.append({
             "severity": "Low",
             "type": "Default VPC Usage",
             "description": "Usage of default VPC detected. Consider creating a custom VPC for better security",
-            "line": terraform_code.index('vpc_id      = aws_default_vpc')
+            "line": default_vpc["line"]
         })
 
     # Check for unencrypted S3 bucket
-    if 'resource "aws_s3_bucket"' in terraform_code and 'server_side_encryption_configuration {' not in terraform_code:
+    bucket = _first(iter_blocks(tree, 'resource'), lambda block: block["labels"][:1] == ['aws_s3_bucket'])
+    has_encryption = (
+        _first(iter_blocks(tree, 'server_side_encryption_configuration')) is not None or
+        _first(iter_blocks(tree, 'resource'), lambda block: block["labels"][:1] == ['aws_s3_bucket_server_side_encryption_configuration']) is not None
+    )
+    if bucket and not has_encryption:
         issues.append({
             "severity": "Medium",
             "type": "Unencrypted S3 Bucket",
             "description": "S3 bucket without server-side encryption detected",
-            "line": terraform_code.index('resource "aws_s3_bucket"')
+            "line": bucket["line"]
         })
 
     # Check for unrestricted outbound traffic
-    if 'egress {' in terraform_code and 'cidr_blocks      = ["0.0.0.0/0"]' in terraform_code:
+    open_egress = _first(iter_blocks(tree, 'egress'), _allows_any_cidr)
+    if open_egress:
         issues.append({
             "severity": "Low",
             "type": "Unrestricted Egress",
             "description": "Unrestricted outbound traffic detected in security group",
-            "line": terraform_code.index('egress {')
+            "line": open_egress["line"]
         })
 
     return issues
 
-def generate_security_report(terraform_code: str) -> str:
-    issues = analyze_security(terraform_code)
+def generate_security_report(terraform_code: str, issues: List[Dict[str, Any]] = None) -> str:
+    if issues is None:
+        issues = analyze_security(terraform_code)
     
     if not issues:
         return "No security issues detected."
@@ -120,7 +148,7 @@ if __name__ == "__main__":
     """
 
     issues = analyze_security(test_code)
-    report = generate_security_report(test_code)
+    report = generate_security_report(test_code, issues)
     score = get_security_score(issues)
 
     print(report)
@@ -0,0 +1,144 @@
+import os
+import sys
+import json
+import argparse
+from multiprocessing import Pool
+from typing import List, Dict, Any, Iterator, TextIO
+from security_analyzer import analyze_security, get_security_score
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_LEVELS = {"High": "error", "Medium": "warning", "Low": "note"}
+
+def find_tf_files(root_dir: str) -> Iterator[str]:
+    """Walk a directory tree and yield every Terraform file in it."""
+    for root, dirs, files in os.walk(root_dir):
+        # Skip provider caches and VCS metadata
+        dirs[:] = [d for d in dirs if d not in ('.terraform', '.git')]
+        for file in files:
+            if file.endswith(('.tf', '.tf.json')):
+                yield os.path.join(root, file)
+
+def read_tf_file(file_path: str) -> str:
+    """Read a Terraform file, replacing bytes that are not valid UTF-8."""
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+def redact_issue(issue: Dict[str, Any]) -> Dict[str, Any]:
+    # Reports end up in CI logs and code scanning uploads, so name the attribute but never quote its value
+    if issue['type'] != 'Hardcoded Secret':
+        return issue
+    return dict(issue, description=f"Potential hardcoded secret in attribute {issue['attribute']}")
+
+def scan_file(file_path: str) -> Dict[str, Any]:
+    """Run the security rules over a single Terraform file; secret values are redacted from the issues."""
+    try:
+        issues = [redact_issue(issue) for issue in analyze_security(read_tf_file(file_path))]
+    except Exception as e:
+        # One unreadable or malformed file is reported as failed instead of aborting the scan
+        return {"file": file_path, "error": f"{type(e).__name__}: {e}", "issues": [], "security_score": None}
+    return {
+        "file": file_path,
+        "issues": issues,
+        "security_score": get_security_score(issues)
+    }
+
+def scan_directory(root_dir: str, workers: int = None, chunksize: int = 16) -> Iterator[Dict[str, Any]]:
+    """Scan every .tf file under root_dir in a process pool, yielding results as they complete."""
+    with Pool(processes=workers) as pool:
+        for result in pool.imap_unordered(scan_file, find_tf_files(root_dir), chunksize=chunksize):
+            yield result
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate per-file results into totals and an overall score."""
+    scores = [r['security_score'] for r in results if r['security_score'] is not None]
+    all_issues = [issue for r in results for issue in r['issues']]
+    severities = {"High": 0, "Medium": 0, "Low": 0}
+    for issue in all_issues:
+        severities[issue['severity']] += 1
+    return {
+        "files_scanned": len(results),
+        "files_failed": len(results) - len(scores),
+        "total_issues": len(all_issues),
+        "issues_by_severity": severities,
+        "average_score": round(sum(scores) / len(scores), 2) if scores else 100,
+        "min_score": min(scores) if scores else 100,
+        "aggregate_score": get_security_score(all_issues)
+    }
+
+def write_jsonl_report(results: Iterator[Dict[str, Any]], out: TextIO) -> Dict[str, Any]:
+    """Stream one JSON line per file followed by a summary line."""
+    collected = []
+    for result in results:
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+        collected.append({"security_score": result['security_score'], "issues": result['issues']})
+    summary = summarize(collected)
+    out.write(json.dumps({"summary": summary}) + "\n")
+    return summary
+
+def _sarif_result(file_path: str, issue: Dict[str, Any], root_dir: str) -> Dict[str, Any]:
+    return {
+        "ruleId": issue['type'],
+        "level": SARIF_LEVELS.get(issue['severity'], "warning"),
+        "message": {"text": issue['description']},
+        "locations": [{
+            "physicalLocation": {
+                "artifactLocation": {"uri": os.path.relpath(file_path, root_dir).replace(os.sep, '/')},
+                "region": {"startLine": max(1, issue['line'])}
+            }
+        }]
+    }
+
+def write_sarif_report(results: Iterator[Dict[str, Any]], out: TextIO, root_dir: str) -> Dict[str, Any]:
+    """Stream a SARIF 2.1.0 log, writing each result as soon as its file is scanned."""
+    out.write('{"$schema": %s, "version": "2.1.0", "runs": [{' % json.dumps(SARIF_SCHEMA))
+    out.write('"tool": {"driver": {"name": "cf2tf-security-scanner"}}, "results": [')
+    collected = []
+    file_scores = {}
+    first = True
+    for result in results:
+        for issue in result['issues']:
+            out.write(("" if first else ",") + json.dumps(_sarif_result(result['file'], issue, root_dir)))
+            first = False
+        out.flush()
+        file_scores[os.path.relpath(result['file'], root_dir)] = result['security_score']
+        collected.append({"security_score": result['security_score'], "issues": result['issues']})
+    summary = summarize(collected)
+    properties = {"summary": summary, "file_scores": file_scores}
+    out.write('], "properties": %s}]}\n' % json.dumps(properties))
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scan existing Terraform code for security issues')
+    parser.add_argument('input', help='Terraform file or directory containing Terraform files')
+    parser.add_argument('-f', '--format', choices=['jsonl', 'sarif'], default='jsonl', help='Report format (default: jsonl)')
+    parser.add_argument('-o', '--output', help='Report file (default: stdout)')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Number of worker processes (default: CPU count)')
+    args = parser.parse_args(argv)
+
+    input_path = os.path.abspath(args.input)
+    if os.path.isfile(input_path):
+        # A single file is scanned in-process; a pool would only add start-up time
+        root_dir = os.path.dirname(input_path)
+        results = iter([scan_file(input_path)])
+    elif os.path.isdir(input_path):
+        root_dir = input_path
+        results = scan_directory(root_dir, args.workers)
+    else:
+        print(f"Error: {args.input} is not a valid file or directory")
+        sys.exit(1)
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        if args.format == 'sarif':
+            summary = write_sarif_report(results, out, root_dir)
+        else:
+            summary = write_jsonl_report(results, out)
+    finally:
+        if args.output:
+            out.close()
+
+    print(f"Scanned {summary['files_scanned']} files, aggregate score: {summary['aggregate_score']}/100", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,31 @@
 import boto3
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
+from aws_scheduler import RequestScheduler, error_code
+from inventory_checkpoint import load_checkpoint, save_checkpoint, format_age
 
-def generate_state_file(regions: List[str], resource_types: List[str]) -> str:
-    state = {
+# Leave retries to the RequestScheduler so throttling isn't retried at two layers
+CLIENT_CONFIG = Config(retries={'max_attempts': 1, 'mode': 'standard'})
+
+# CloudFormation types the state step can inventory, keyed to their fetcher
+FETCHABLE_TYPES = {
+    'AWS::S3::Bucket': 'aws_s3_bucket',
+    'AWS::EC2::Instance': 'aws_ec2_instance',
+    'AWS::EC2::VPC': 'aws_vpc',
+    'AWS::EC2::Subnet': 'aws_subnet',
+    'AWS::EC2::SecurityGroup': 'aws_security_group',
+}
+# Tags CloudFormation puts on every resource it creates
+LOGICAL_ID_TAG = 'aws:cloudformation:logical-id'
+STACK_NAME_TAG = 'aws:cloudformation:stack-name'
+EC2_FILTER_LIMIT = 200
+
+def new_state() -> Dict[str, Any]:
+    return {
         "version": 4,
         "terraform_version": "1.0.0",
         "serial": 1,
@@ -13,149 +34,276 @@ def generate_state_file(regions: List[str], resource_types: List[str]) -> str:
         "resources": []
     }
 
-    for region in regions:
+def build_inventory_scope(resource_index: Dict[str, Dict[str, Any]], stack_names: List[str] = None) -> Dict[str, Dict[str, List[str]]]:
+    """Group the converted templates' logical IDs and known physical names by fetcher type.
+
+    Logical IDs such as VPC or Bucket are reused across stacks, so they only
+    narrow the inventory to this deployment when the stack names are given
+    too; unnamed buckets cannot be found at all without them.
+    """
+    scope = {}
+    for logical_id, entry in resource_index.items():
+        resource_type = FETCHABLE_TYPES.get(entry['cf_type'])
+        if resource_type is None:
+            continue
+        type_scope = scope.setdefault(resource_type, {"logical_ids": [], "names": [], "unnamed_ids": [], "stack_names": list(stack_names or [])})
+        type_scope["logical_ids"].append(logical_id)
+        if entry.get('physical_name'):
+            type_scope["names"].append(entry['physical_name'])
+        else:
+            type_scope["unnamed_ids"].append(logical_id)
+    return scope
+
+def generate_state_file(regions: List[str], resource_types: List[str], scheduler: RequestScheduler = None, max_workers: int = 8,
+                        checkpoint_dir: str = None, max_age: float = None, scope: Dict[str, Dict[str, List[str]]] = None,
+                        resume: bool = False) -> str:
+    """Inventory every (region, type) partition and return the state file.
+
+    Completed partitions are always checkpointed to checkpoint_dir, but they
+    are only reused when resume is set (and they are younger than max_age
+    seconds), so a later run never silently picks up old inventory.
+    """
+    scheduler = scheduler or RequestScheduler()
+    state = new_state()
+    if scope is not None:
+        # Only fetch types the converted templates declare
+        resource_types = [resource_type for resource_type in resource_types if resource_type in scope]
+    partitions = [(region, resource_type) for region in regions for resource_type in resource_types]
+
+    def fetch_partition(partition):
+        region, resource_type = partition
+        type_scope = scope.get(resource_type) if scope is not None else None
+        if checkpoint_dir and resume:
+            checkpoint = load_checkpoint(checkpoint_dir, region, resource_type, max_age, type_scope)
+            if checkpoint is not None:
+                return checkpoint['resources'], checkpoint.get('fetched_at', 0)
+        # Sessions aren't thread-safe, so every partition gets its own
         session = boto3.Session(region_name=region)
-        
-        for resource_type in resource_types:
-            try:
-                resources = fetch_resources(session, resource_type)
-                state['resources'].extend(resources)
-            except Exception as e:
-                print(f"Error fetching {resource_type} in {region}: {str(e)}")
+        try:
+            resources = fetch_resources(session, resource_type, scheduler, type_scope)
+        except Exception as e:
+            print(f"Error fetching {resource_type} in {region}: {str(e)}")
+            scheduler.record_failure(resource_type, region, e)
+            return [], None
+        # Incomplete partitions are not checkpointed, so the next run fetches them again
+        if checkpoint_dir and not scheduler.has_failures(resource_type, region):
+            save_checkpoint(checkpoint_dir, region, resource_type, resources, type_scope)
+        return resources, None
+
+    # The scheduler, not the pool size, decides how many calls are in flight per service and region
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for (region, resource_type), (resources, fetched_at) in zip(partitions, pool.map(fetch_partition, partitions)):
+            if fetched_at is not None:
+                print(f"Reusing {resource_type} in {region} from a checkpoint fetched {format_age(time.time() - fetched_at)} ago")
+            state['resources'].extend(resources)
 
+    if scheduler.failures:
+        print(f"Warning: {len(scheduler.failures)} resource fetches failed; the state file is incomplete")
     return json.dumps(state, indent=2)
 
-def fetch_resources(session: boto3.Session, resource_type: str) -> List[Dict[str, Any]]:
+def fetch_resources(session: boto3.Session, resource_type: str, scheduler: RequestScheduler, type_scope: Dict[str, List[str]] = None) -> List[Dict[str, Any]]:
     resources = []
 
     if resource_type == 'aws_s3_bucket':
-        resources.extend(fetch_s3_buckets(session))
+        resources.extend(fetch_s3_buckets(session, scheduler, type_scope))
     elif resource_type == 'aws_ec2_instance':
-        resources.extend(fetch_ec2_instances(session))
+        resources.extend(fetch_ec2_instances(session, scheduler, type_scope))
     elif resource_type == 'aws_vpc':
-        resources.extend(fetch_vpcs(session))
+        resources.extend(fetch_vpcs(session, scheduler, type_scope))
     elif resource_type == 'aws_subnet':
-        resources.extend(fetch_subnets(session))
+        resources.extend(fetch_subnets(session, scheduler, type_scope))
     elif resource_type == 'aws_security_group':
-        resources.extend(fetch_security_groups(session))
+        resources.extend(fetch_security_groups(session, scheduler, type_scope))
     # Add more resource types here as needed
 
     return resources
 
-def fetch_s3_buckets(session: boto3.Session) -> List[Dict[str, Any]]:
-    s3 = session.client('s3')
+def paginate(scheduler: RequestScheduler, service: str, method, result_key: str, region: str = None, **kwargs) -> Iterator[Dict[str, Any]]:
+    # Page by hand so the scheduler sees (and can retry) every request
+    while True:
+        response = scheduler.call(service, method, region=region, **kwargs)
+        yield from response.get(result_key, [])
+        next_token = response.get('NextToken')
+        if not next_token:
+            return
+        kwargs['NextToken'] = next_token
+
+def scoped_filters(type_scope: Dict[str, List[str]] = None, name_filter: str = None) -> List[List[Dict[str, Any]]]:
+    if type_scope is None:
+        return [[]]
+    # EC2 ANDs filters with different names, so tag and name matches are
+    # separate queries, and the stack name is ANDed onto the logical-ID match
+    stack_filter = [{'Name': f"tag:{STACK_NAME_TAG}", 'Values': type_scope["stack_names"]}] if type_scope.get("stack_names") else []
+    queries = []
+    for key, filter_name, extra in (('logical_ids', f"tag:{LOGICAL_ID_TAG}", stack_filter), ('names', name_filter, [])):
+        values = type_scope[key] if filter_name else []
+        for i in range(0, len(values), EC2_FILTER_LIMIT):
+            queries.append([{'Name': filter_name, 'Values': values[i:i + EC2_FILTER_LIMIT]}] + extra)
+    return queries
+
+def describe_scoped(scheduler: RequestScheduler, method, result_key: str, id_key: str,
+                    type_scope: Dict[str, List[str]] = None, name_filter: str = None, region: str = None) -> Iterator[Dict[str, Any]]:
+    seen = set()
+    for filters in scoped_filters(type_scope, name_filter):
+        kwargs = {'Filters': filters} if filters else {}
+        for item in paginate(scheduler, 'ec2', method, result_key, region, **kwargs):
+            if item[id_key] not in seen:
+                seen.add(item[id_key])
+                yield item
+
+def generated_bucket_prefixes(type_scope: Dict[str, List[str]]) -> List[str]:
+    # CloudFormation names unnamed buckets <stack>-<logicalid>-<suffix>, lowercased
+    return [f"{stack_name}-{logical_id}-".lower() for stack_name in type_scope.get("stack_names", []) for logical_id in type_scope["unnamed_ids"]]
+
+def scoped_bucket_names(s3, scheduler: RequestScheduler, type_scope: Dict[str, List[str]] = None, region: str = None) -> List[str]:
+    names = list(type_scope["names"]) if type_scope else []
+    # S3 has no server-side filters, so buckets are only listed when the
+    # templates leave some names to CloudFormation and the stacks are known
+    prefixes = [] if type_scope is None else generated_bucket_prefixes(type_scope)
+    if type_scope is None or prefixes:
+        for bucket in scheduler.call('s3', s3.list_buckets, region=region)['Buckets']:
+            if type_scope is None or (bucket['Name'] not in names and bucket['Name'].startswith(tuple(prefixes))):
+                names.append(bucket['Name'])
+    return names
+
+def fetch_s3_buckets(session: boto3.Session, scheduler: RequestScheduler, type_scope: Dict[str, List[str]] = None) -> List[Dict[str, Any]]:
+    s3 = session.client('s3', config=CLIENT_CONFIG)
     resources = []
     try:
-        response = s3.list_buckets()
-        for bucket in response['Buckets']:
-            resources.append({
-                "mode": "managed",
-                "type": "aws_s3_bucket",
-                "name": bucket['Name'],
-                "provider": f"provider[\"registry.terraform.io/hashicorp/aws\"]",
-                "instances": [
-                    {
-                        "schema_version": 0,
-                        "attributes": {
-                            "bucket": bucket['Name'],
-                            "arn": f"arn:aws:s3:::{bucket['Name']}",
-                            "region": s3.get_bucket_location(Bucket=bucket['Name'])['LocationConstraint'] or 'us-east-1'
-                        }
-                    }
-                ]
-            })
+        bucket_names = scoped_bucket_names(s3, scheduler, type_scope, session.region_name)
     except ClientError as e:
         print(f"Error fetching S3 buckets: {e}")
+        scheduler.record_failure('aws_s3_bucket', session.region_name, e)
+        return resources
+    for bucket_name in bucket_names:
+        bucket = {'Name': bucket_name}
+        try:
+            location = scheduler.call('s3', s3.get_bucket_location, region=session.region_name, Bucket=bucket['Name'])['LocationConstraint']
+        except ClientError as e:
+            if type_scope is not None and error_code(e) == 'NoSuchBucket':
+                # Named in a template but not deployed
+                continue
+            print(f"Error fetching S3 bucket {bucket['Name']}: {e}")
+            scheduler.record_failure('aws_s3_bucket', session.region_name, e, bucket['Name'])
+            continue
+        resources.append({
+            "mode": "managed",
+            "type": "aws_s3_bucket",
+            "name": bucket['Name'],
+            "provider": f"provider[\"registry.terraform.io/hashicorp/aws\"]",
+            "instances": [
+                {
+                    "schema_version": 0,
+                    "attributes": {
+                        "bucket": bucket['Name'],
+                        "arn": f"arn:aws:s3:::{bucket['Name']}",
+                        "region": location or 'us-east-1'
+                    }
+                }
+            ]
+        })
     return resources
 
-def fetch_ec2_instances(session: boto3.Session) -> List[Dict[str, Any]]:
-    ec2 = session.resource('ec2')
+def fetch_ec2_instances(session: boto3.Session, scheduler: RequestScheduler, type_scope: Dict[str, List[str]] = None) -> List[Dict[str, Any]]:
+    ec2 = session.client('ec2', config=CLIENT_CONFIG)
     resources = []
     try:
-        for instance in ec2.instances.all():
-            resources.append({
-                "mode": "managed",
-                "type": "aws_instance",
-                "name": instance.id,
-                "provider": f"provider[\"registry.terraform.io/hashicorp/aws\"]",
-                "instances": [
-                    {
-                        "schema_version": 1,
-                        "attributes": {
-                            "id": instance.id,
-                            "instance_type": instance.instance_type,
-                            "ami": instance.image_id,
-                            "vpc_id": instance.vpc_id,
-                            "subnet_id": instance.subnet_id,
-                            "private_ip": instance.private_ip_address,
-                            "public_ip": instance.public_ip_address,
+        for reservation in describe_scoped(scheduler, ec2.describe_instances, 'Reservations', 'ReservationId', type_scope, region=session.region_name):
+            for instance in reservation['Instances']:
+                resources.append({
+                    "mode": "managed",
+                    "type": "aws_instance",
+                    "name": instance['InstanceId'],
+                    "provider": f"provider[\"registry.terraform.io/hashicorp/aws\"]",
+                    "instances": [
+                        {
+                            "schema_version": 1,
+                            "attributes": {
+                                "id": instance['InstanceId'],
+                                "instance_type": instance.get('InstanceType'),
+                                "ami": instance.get('ImageId'),
+                                "vpc_id": instance.get('VpcId'),
+                                "subnet_id": instance.get('SubnetId'),
+                                "private_ip": instance.get('PrivateIpAddress'),
+                                "public_ip": instance.get('PublicIpAddress'),
+                            }
                         }
-                    }
-                ]
-            })
+                    ]
+                })
     except ClientError as e:
         print(f"Error fetching EC2 instances: {e}")
+        scheduler.record_failure('aws_ec2_instance', session.region_name, e)
     return resources
 
-def fetch_vpcs(session: boto3.Session) -> List[Dict[str, Any]]:
-    ec2 = session.resource('ec2')
+def fetch_vpcs(session: boto3.Session, scheduler: RequestScheduler, type_scope: Dict[str, List[str]] = None) -> List[Dict[str, Any]]:
+    ec2 = session.client('ec2', config=CLIENT_CONFIG)
     resources = []
     try:
-        for vpc in ec2.vpcs.all():
-            resources.append({
-                "mode": "managed",
-                "type": "aws_vpc",
-                "name": vpc.id,
-                "provider": f"provider[\"registry.terraform.io/hashicorp/aws\"]",
-                "instances": [
-                    {
-                        "schema_version": 1,
-                        "attributes": {
-                            "id": vpc.id,
-                            "cidr_block": vpc.cidr_block,
-                            "enable_dns_hostnames": vpc.describe_attribute(Attribute='enableDnsHostnames')['EnableDnsHostnames']['Value'],
-                            "enable_dns_support": vpc.describe_attribute(Attribute='enableDnsSupport')['EnableDnsSupport']['Value'],
-                        }
-                    }
-                ]
-            })
+        vpcs = list(describe_scoped(scheduler, ec2.describe_vpcs, 'Vpcs', 'VpcId', type_scope, region=session.region_name))
     except ClientError as e:
         print(f"Error fetching VPCs: {e}")
+        scheduler.record_failure('aws_vpc', session.region_name, e)
+        return resources
+    for vpc in vpcs:
+        try:
+            dns_hostnames = scheduler.call('ec2', ec2.describe_vpc_attribute, region=session.region_name, VpcId=vpc['VpcId'], Attribute='enableDnsHostnames')
+            dns_support = scheduler.call('ec2', ec2.describe_vpc_attribute, region=session.region_name, VpcId=vpc['VpcId'], Attribute='enableDnsSupport')
+        except ClientError as e:
+            print(f"Error fetching VPC {vpc['VpcId']}: {e}")
+            scheduler.record_failure('aws_vpc', session.region_name, e, vpc['VpcId'])
+            continue
+        resources.append({
+            "mode": "managed",
+            "type": "aws_vpc",
+            "name": vpc['VpcId'],
+            "provider": f"provider[\"registry.terraform.io/hashicorp/aws\"]",
+            "instances": [
+                {
+                    "schema_version": 1,
+                    "attributes": {
+                        "id": vpc['VpcId'],
+                        "cidr_block": vpc['CidrBlock'],
+                        "enable_dns_hostnames": dns_hostnames['EnableDnsHostnames']['Value'],
+                        "enable_dns_support": dns_support['EnableDnsSupport']['Value'],
+                    }
+                }
+            ]
+        })
     return resources
 
-def fetch_subnets(session: boto3.Session) -> List[Dict[str, Any]]:
-    ec2 = session.resource('ec2')
+def fetch_subnets(session: boto3.Session, scheduler: RequestScheduler, type_scope: Dict[str, List[str]] = None) -> List[Dict[str, Any]]:
+    ec2 = session.client('ec2', config=CLIENT_CONFIG)
     resources = []
     try:
-        for subnet in ec2.subnets.all():
+        for subnet in describe_scoped(scheduler, ec2.describe_subnets, 'Subnets', 'SubnetId', type_scope, region=session.region_name):
             resources.append({
                 "mode": "managed",
                 "type": "aws_subnet",
-                "name": subnet.id,
+                "name": subnet['SubnetId'],
                 "provider": f"provider[\"registry.terraform.io/hashicorp/aws\"]",
                 "instances": [
                     {
                         "schema_version": 1,
                         "attributes": {
-                            "id": subnet.id,
-                            "vpc_id": subnet.vpc_id,
-                            "cidr_block": subnet.cidr_block,
-                            "availability_zone": subnet.availability_zone,
-                            "map_public_ip_on_launch": subnet.map_public_ip_on_launch,
+                            "id": subnet['SubnetId'],
+                            "vpc_id": subnet['VpcId'],
+                            "cidr_block": subnet['CidrBlock'],
+                            "availability_zone": subnet['AvailabilityZone'],
+                            "map_public_ip_on_launch": subnet['MapPublicIpOnLaunch'],
                         }
                     }
                 ]
             })
     except ClientError as e:
         print(f"Error fetching subnets: {e}")
+        scheduler.record_failure('aws_subnet', session.region_name, e)
     return resources
 
-def fetch_security_groups(session: boto3.Session) -> List[Dict[str, Any]]:
-    ec2 = session.client('ec2')
+def fetch_security_groups(session: boto3.Session, scheduler: RequestScheduler, type_scope: Dict[str, List[str]] = None) -> List[Dict[str, Any]]:
+    ec2 = session.client('ec2', config=CLIENT_CONFIG)
     resources = []
     try:
-        response = ec2.describe_security_groups()
-        for sg in response['SecurityGroups']:
+        for sg in describe_scoped(scheduler, ec2.describe_security_groups, 'SecurityGroups', 'GroupId', type_scope, 'group-name', session.region_name):
             resources.append({
                 "mode": "managed",
                 "type": "aws_security_group",
@@ -177,8 +325,79 @@ def fetch_security_groups(session: boto3.Session) -> List[Dict[str, Any]]:
             })
     except ClientError as e:
         print(f"Error fetching security groups: {e}")
+        scheduler.record_failure('aws_security_group', session.region_name, e)
     return resources
 
+# Offline mode: build state from `aws cloudformation describe-stack-resources`
+# or `list-stack-resources` JSON output instead of scanning the account
+def load_stack_exports(export_paths: List[str]) -> List[Dict[str, Any]]:
+    stack_resources = []
+    for export_path in export_paths:
+        with open(export_path, 'r') as f:
+            export = json.load(f)
+        if isinstance(export, list):
+            stack_resources.extend(export)
+        else:
+            stack_resources.extend(export.get('StackResources', []))
+            stack_resources.extend(export.get('StackResourceSummaries', []))
+    return stack_resources
+
+def map_stack_resources(stack_resources: List[Dict[str, Any]], resource_index: Dict[str, Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Pair each Terraform address with the physical ID of its stack resource.
+
+    Raises ValueError when two exports give one logical ID different physical
+    IDs (the same template deployed as several stacks), as Terraform rejects
+    duplicate addresses; such stacks need one output directory each.
+    """
+    mapped = []
+    mapped_ids = {}
+    for stack_resource in stack_resources:
+        logical_id = stack_resource.get('LogicalResourceId')
+        entry = resource_index.get(logical_id)
+        physical_id = stack_resource.get('PhysicalResourceId')
+        # Skip resources the templates don't declare, and ones that were never created
+        if entry is None or not physical_id or entry['cf_type'] != stack_resource.get('ResourceType', entry['cf_type']):
+            continue
+        if logical_id in mapped_ids:
+            if mapped_ids[logical_id] != physical_id:
+                raise ValueError(f"{logical_id} maps to both {mapped_ids[logical_id]} and {physical_id} in the stack exports; pass one export per template")
+            # The same stack exported twice
+            continue
+        mapped_ids[logical_id] = physical_id
+        for address in entry['addresses']:
+            mapped.append({"address": address, "id": physical_id})
+    return mapped
+
+def generate_state_from_exports(export_paths: List[str], resource_index: Dict[str, Dict[str, Any]]) -> str:
+    state = new_state()
+    for resource in map_stack_resources(load_stack_exports(export_paths), resource_index):
+        resource_type, name = resource['address'].split('.', 1)
+        state['resources'].append({
+            "mode": "managed",
+            "type": resource_type,
+            "name": name,
+            "provider": f"provider[\"registry.terraform.io/hashicorp/aws\"]",
+            "instances": [
+                {
+                    "schema_version": 0,
+                    "attributes": {
+                        "id": resource['id']
+                    }
+                }
+            ]
+        })
+    return json.dumps(state, indent=2)
+
+def generate_import_blocks(export_paths: List[str], resource_index: Dict[str, Dict[str, Any]]) -> str:
+    blocks = []
+    for resource in map_stack_resources(load_stack_exports(export_paths), resource_index):
+        blocks.append('import {')
+        blocks.append(f'  to = {resource["address"]}')
+        blocks.append(f'  id = {json.dumps(resource["id"])}')
+        blocks.append('}')
+        blocks.append('')
+    return '\n'.join(blocks)
+
 def save_state_file(state: str, filename: str):
     with open(filename, 'w') as f:
         f.write(state)
@@ -0,0 +1,210 @@
+import json
+import yaml
+from typing import Dict, Any, Optional
+
+NO_VALUE = 'AWS::NoValue'
+
+# Marks a value resolved to AWS::NoValue, which removes the enclosing property or list item
+_REMOVED = object()
+# Marks an operand whose value cannot be known before deployment
+_UNKNOWN = object()
+
+def parameter_string(value: Any) -> str:
+    """Return a parameter or literal value as the string CloudFormation compares it as.
+
+    YAML loads true/false as booleans, which str() would turn into
+    "True"/"False".
+    """
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+def load_parameter_values(file_path: str) -> Dict[str, str]:
+    """Read parameter values from a JSON or YAML file.
+
+    Accepts a plain {"Name": "value"} mapping, a template configuration file
+    ({"Parameters": {...}}) or the list the AWS CLI takes,
+    [{"ParameterKey": "Name", "ParameterValue": "value"}, ...].
+    """
+    with open(file_path, 'r') as f:
+        data = json.load(f) if file_path.endswith('.json') else yaml.safe_load(f)
+    if isinstance(data, dict) and isinstance(data.get('Parameters'), dict):
+        data = data['Parameters']
+    if isinstance(data, list):
+        return {item['ParameterKey']: parameter_string(item['ParameterValue']) for item in data}
+    if isinstance(data, dict):
+        return {name: parameter_string(value) for name, value in data.items()}
+    raise ValueError(f"{file_path} does not contain parameter values")
+
+def resolve_parameters(cf_template: Dict[str, Any], parameter_values: Dict[str, str]) -> Dict[str, str]:
+    """Combine supplied values with template defaults. Supplied values may also
+    set pseudo parameters such as AWS::Region."""
+    parameters = {}
+    for name, data in (cf_template.get('Parameters') or {}).items():
+        if 'Default' in data:
+            parameters[name] = parameter_string(data['Default'])
+    parameters.update(parameter_values)
+    return parameters
+
+def _operand(value: Any, parameters: Dict[str, str]) -> Any:
+    if isinstance(value, dict):
+        if list(value) == ['Ref']:
+            return parameters.get(value['Ref'], _UNKNOWN)
+        return _UNKNOWN
+    if isinstance(value, (str, bool, int, float)):
+        return parameter_string(value)
+    return _UNKNOWN
+
+def evaluate_conditions(cf_template: Dict[str, Any], parameters: Dict[str, str]) -> Dict[str, Optional[bool]]:
+    """Evaluate every entry in Conditions once.
+
+    Each condition is True, False or None when it depends on something
+    unknown before deployment (an unset parameter, a mapping lookup, ...).
+    """
+    conditions = cf_template.get('Conditions') or {}
+    values: Dict[str, Optional[bool]] = {}
+
+    def condition(name: str) -> Optional[bool]:
+        if name not in values:
+            # Guards against cycles; a condition that refers back to itself stays unknown
+            values[name] = None
+            values[name] = evaluate(conditions[name]) if name in conditions else None
+        return values[name]
+
+    def evaluate(expression: Any) -> Optional[bool]:
+        if not isinstance(expression, dict) or len(expression) != 1:
+            return None
+        function, args = next(iter(expression.items()))
+        if function == 'Condition':
+            return condition(args)
+        if function == 'Fn::Equals' and isinstance(args, list) and len(args) == 2:
+            left, right = (_operand(arg, parameters) for arg in args)
+            if left is _UNKNOWN or right is _UNKNOWN:
+                return None
+            return left == right
+        if function == 'Fn::Not' and isinstance(args, list) and len(args) == 1:
+            value = evaluate(args[0])
+            return None if value is None else not value
+        if function in ('Fn::And', 'Fn::Or') and isinstance(args, list):
+            results = [evaluate(arg) for arg in args]
+            decisive = function == 'Fn::Or'
+            if decisive in results:
+                return decisive
+            return None if None in results else not decisive
+        return None
+
+    for name in conditions:
+        condition(name)
+    return values
+
+def _specialize_value(value: Any, condition_values: Dict[str, Optional[bool]]) -> Any:
+    if isinstance(value, dict):
+        if list(value) == ['Fn::If']:
+            args = value['Fn::If']
+            if isinstance(args, list) and len(args) == 3 and condition_values.get(args[0]) is not None:
+                chosen = args[1] if condition_values[args[0]] else args[2]
+                if chosen == {"Ref": NO_VALUE}:
+                    return _REMOVED
+                return _specialize_value(chosen, condition_values)
+        specialized = {}
+        for key, item in value.items():
+            item = _specialize_value(item, condition_values)
+            if item is not _REMOVED:
+                specialized[key] = item
+        return specialized
+    if isinstance(value, list):
+        items = (_specialize_value(item, condition_values) for item in value)
+        return [item for item in items if item is not _REMOVED]
+    return value
+
+def specialize_template(cf_template: Dict[str, Any], parameter_values: Dict[str, str]) -> Dict[str, Any]:
+    """Return a copy of the template reduced to what is active for the given parameter values.
+
+    Resources and outputs whose Condition is false are dropped, Fn::If is
+    replaced by its chosen branch (or removed for AWS::NoValue), DependsOn
+    entries naming dropped resources are removed and parameter defaults are
+    set to the supplied values. Anything depending on an unknown condition
+    is kept as it was.
+    """
+    parameters = resolve_parameters(cf_template, parameter_values)
+    condition_values = evaluate_conditions(cf_template, parameters)
+
+    def active(entry: Dict[str, Any]) -> bool:
+        return not isinstance(entry, dict) or condition_values.get(entry.get('Condition')) is not False
+
+    specialized = dict(cf_template)
+
+    if 'Parameters' in cf_template:
+        specialized['Parameters'] = {
+            name: dict(data, Default=parameter_values[name]) if name in parameter_values else data
+            for name, data in cf_template['Parameters'].items()
+        }
+
+    if 'Conditions' in cf_template:
+        unresolved = {name: expression for name, expression in cf_template['Conditions'].items() if condition_values.get(name) is None}
+        if unresolved:
+            specialized['Conditions'] = unresolved
+        else:
+            del specialized['Conditions']
+
+    if 'Resources' in cf_template:
+        resources = {name: _specialize_value(resource, condition_values)
+                     for name, resource in cf_template['Resources'].items() if active(resource)}
+        for resource in resources.values():
+            depends_on = resource.get('DependsOn')
+            if isinstance(depends_on, list):
+                resource['DependsOn'] = [name for name in depends_on if name in resources]
+            elif isinstance(depends_on, str) and depends_on not in resources:
+                del resource['DependsOn']
+        specialized['Resources'] = resources
+
+    if 'Outputs' in cf_template:
+        specialized['Outputs'] = {name: _specialize_value(output, condition_values)
+                                  for name, output in cf_template['Outputs'].items() if active(output)}
+
+    return specialized
+
+if __name__ == "__main__":
+    # For testing purposes
+    from cf_to_tf_converter import load_cloudformation_content
+    test_template = load_cloudformation_content("""
+Parameters:
+  Env:
+    Type: String
+    Default: dev
+  EnableLogs:
+    Type: String
+    Default: true
+Conditions:
+  IsProd: !Equals [!Ref Env, prod]
+  NotProd: !Not [!Condition IsProd]
+  LogsEnabled: !Equals [!Ref EnableLogs, true]
+  LogsEnabledQuoted: !Equals [!Ref EnableLogs, "true"]
+  InUsEast: !Equals [!Sub "${AWS::Region}", us-east-1]
+Resources:
+  Logs:
+    Type: AWS::S3::Bucket
+    Condition: IsProd
+  AccessLogs:
+    Type: AWS::S3::Bucket
+    Condition: LogsEnabled
+  AuditLogs:
+    Type: AWS::S3::Bucket
+    Condition: LogsEnabledQuoted
+  Replica:
+    Type: AWS::S3::Bucket
+    Condition: InUsEast
+  Queue:
+    Type: AWS::SQS::Queue
+    Properties:
+      VisibilityTimeout: !If [IsProd, 300, 30]
+      DelaySeconds: !If [NotProd, !Ref AWS::NoValue, 5]
+""")
+    for env in ('dev', 'prod'):
+        print(env, json.dumps(specialize_template(test_template, {'Env': env})['Resources']))
+    # YAML booleans compare as "true"/"false", whether they come from a default, a literal or a parameter file
+    for values in ({}, {'EnableLogs': parameter_string(True)}):
+        resources = specialize_template(test_template, values)['Resources']
+        assert 'AccessLogs' in resources and 'AuditLogs' in resources, values
+    # Other intrinsics inside a condition are unknown, even with the pseudo parameter they refer to set
+    assert 'Replica' in specialize_template(test_template, {'AWS::Region': 'us-east-1'})['Resources']